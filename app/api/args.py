@@ -1,14 +1,21 @@
-from tqdm import tqdm
-import sys
 import argparse
-import json
-from config import api_key_utils
-from api.openrouter.openrouter import OpenRouter
-from api.prompts.prompts import FastApiPrompts
-from api.parser.parser import ParserFunctions
-from api.test_runner.test_runner import FastAPITestRunner
-from api.file_functions.file_functions import FileFunctions
-from config.rich_console import rich_console
+import importlib
+import os
+from api.prompts.context_assembler import DEFAULT_CONTEXT_TOKENS
+
+# Subcommand -> (module, function). Modules are imported only when their command runs, so commands like
+# get-apikey don't pay for InquirerPy, httpx, tqdm and the test runner at startup.
+COMMANDS = {
+    "set-apikey": ("api.commands.keys", "set_apikey"),
+    "get-apikey": ("api.commands.keys", "get_apikey"),
+    "delete-apikey": ("api.commands.keys", "delete_apikey"),
+    "set-max-attempts": ("api.commands.keys", "set_max_attempts"),
+    "get-max-attempts": ("api.commands.keys", "get_max_attempts"),
+    "refresh-models": ("api.commands.models", "refresh_models"),
+    "run": ("api.commands.run", "run"),
+    "batch": ("api.commands.batch", "batch"),
+    "fake-openrouter": ("api.commands.fake_openrouter", "fake_openrouter"),
+}
 
 def get_args(): 
     parser = argparse.ArgumentParser(description='OpenRouter AI tool manager')
@@ -21,104 +28,69 @@ def get_args():
     subparsers.add_parser('delete-apikey', help='Delete OpenRouter API key')
 
     run_parser = subparsers.add_parser('run', help='Parse OpenAPI file and generate test cases')
-    run_parser.add_argument('--openapi-path', required=True, help='Path to OpenAPI spec file')
-    run_parser.add_argument('--project-path', required=True, help='Path of your backend project')
-    run_parser.add_argument('--save-as', required=True, help='Name of the file to save the test file ')
+    run_parser.add_argument('--openapi-path', required=False, help='Path to OpenAPI spec file (required unless --resume is given)')
+    run_parser.add_argument('--project-path', required=False, help='Path of your backend project (required unless --resume is given)')
+    run_parser.add_argument('--save-as', required=False, help='Name of the file to save the test file (required unless --resume is given)')
     run_parser.add_argument('--venv-path', required=False, help='Path to your virtual environment (e.g. ./venv)')
+    run_parser.add_argument('--concurrency', required=False, type=int, default=1, help='Number of endpoints to generate test scenarios for in parallel (default: 1)')
+    run_parser.add_argument('--pipeline', action='store_true', help='Stream each chosen endpoint through code generation and the test fix loop on its own instead of running them in strict phases')
+    run_parser.add_argument('--test-workers', required=False, type=int, default=1, help='Number of test fix loops running at the same time in --pipeline mode (default: 1)')
+    run_parser.add_argument('--connect-timeout', required=False, type=float, default=10.0, help='Seconds to wait for a connection to OpenRouter (default: 10)')
+    run_parser.add_argument('--read-timeout', required=False, type=float, default=300.0, help='Seconds to wait for an OpenRouter response (default: 300)')
+    run_parser.add_argument('--http2', action='store_true', help='Use HTTP/2 for OpenRouter requests (requires the h2 package)')
+    cache_group = run_parser.add_mutually_exclusive_group()
+    cache_group.add_argument('--no-cache', action='store_true', help='Do not read or write the LLM response cache')
+    cache_group.add_argument('--refresh-cache', action='store_true', help='Ignore cached LLM responses but store the new ones')
+    run_parser.add_argument('--batch-tokens', required=False, type=int, default=None, help='Pack several endpoints into one scenario prompt up to this many estimated tokens')
+    run_parser.add_argument('--context-budget', required=False, type=int, default=DEFAULT_CONTEXT_TOKENS, help=f'Estimated token budget of code generation and fix prompts (default: {DEFAULT_CONTEXT_TOKENS})')
+    run_parser.add_argument('--llm-related-endpoints', action='store_true', help='Let the model refine the locally computed related endpoints of each path')
+    run_parser.add_argument('--stream', action='store_true', help='Stream OpenRouter completions and stop reading as soon as the code block or answer is complete')
+    run_parser.add_argument('--max-retries', required=False, type=int, default=5, help='Retries for OpenRouter requests failing with 429/5xx or connection errors (default: 5)')
+    run_parser.add_argument('--requests-per-minute', required=False, type=float, default=None, help='Client-side limit of OpenRouter requests per minute shared by all workers')
+    run_parser.add_argument('--tokens-per-minute', required=False, type=float, default=None, help='Client-side limit of estimated prompt tokens per minute shared by all workers')
+    run_parser.add_argument('--cache-max-mb', required=False, type=int, default=256, help='Size cap of the LLM response cache in MB (default: 256)')
+    run_parser.add_argument('--warm-worker', required=False, action='store_true', help='Run tests in a persistent pytest worker inside the target venv instead of a new process per attempt')
+    run_parser.add_argument('--worker-max-runs', required=False, type=int, default=50, help='Restart a warm worker after this many test runs (default: 50)')
+    run_parser.add_argument('--final-workers', required=False, type=int, default=os.cpu_count() or 1, help='Number of pytest processes the final combined test file is spread over (default: CPU count)')
+    run_parser.add_argument('--journal', required=False, help='Where to write the run journal (default: a new file under ~/.cache/testpilotai/journals)')
+    run_parser.add_argument('--resume', required=False, metavar='JOURNAL', help='Continue an interrupted run from its journal file')
+
+    batch_parser = subparsers.add_parser('batch', help='Generate tests for several services from a config file without any prompts')
+    batch_parser.add_argument('--config', required=True, help='Path to the JSON batch config (services, model, auth endpoints, endpoint filters, limits)')
+    batch_parser.add_argument('--journal-dir', required=False, help='Directory of the per-service run journals; finished services in it are skipped (default: a new directory under ~/.cache/testpilotai/journals)')
+    batch_parser.add_argument('--context-budget', required=False, type=int, default=DEFAULT_CONTEXT_TOKENS, help=f'Estimated token budget of code generation and fix prompts (default: {DEFAULT_CONTEXT_TOKENS})')
+    batch_parser.add_argument('--batch-tokens', required=False, type=int, default=None, help='Pack several endpoints into one scenario prompt up to this many estimated tokens')
+    batch_parser.add_argument('--final-workers', required=False, type=int, default=os.cpu_count() or 1, help='Number of pytest processes each final combined test file is spread over (default: CPU count)')
+    batch_parser.add_argument('--stream', action='store_true', help='Stream OpenRouter completions and stop reading as soon as the code block or answer is complete')
+    batch_parser.add_argument('--max-retries', required=False, type=int, default=5, help='Retries for OpenRouter requests failing with 429/5xx or connection errors (default: 5)')
+    batch_parser.add_argument('--no-cache', action='store_true', help='Do not read or write the LLM response cache')
+
+    subparsers.add_parser('refresh-models', help='Download the OpenRouter model list again and update the local model catalogue')
 
     set_attempts_parser = subparsers.add_parser('set-max-attempts', help='Set the maximum number of attempts for test fix loop')
     set_attempts_parser.add_argument('--value', required=True, type=int, help='Maximum number of test fix attempts')
 
     subparsers.add_parser('get-max-attempts', help='Get the current maximum number of test fix attempts')
 
+    fake_parser = subparsers.add_parser('fake-openrouter', help='Serve a local stand-in for the OpenRouter API for offline load tests (point the tool at it with TESTPILOTAI_BASE_URL)')
+    fake_parser.add_argument('--host', required=False, default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    fake_parser.add_argument('--port', required=False, type=int, default=8765, help='Port to listen on (default: 8765)')
+    fake_parser.add_argument('--latency', required=False, default='fixed:0', help='Latency per completion in seconds: fixed:S, uniform:MIN,MAX, normal:MEAN,STDDEV, lognormal:MU,SIGMA or exponential:MEAN (default: fixed:0)')
+    fake_parser.add_argument('--token-delay', required=False, type=float, default=0.0, help='Seconds between streamed chunks (default: 0)')
+    fake_parser.add_argument('--chunk-chars', required=False, type=int, default=16, help='Characters per streamed chunk (default: 16)')
+    fake_parser.add_argument('--rate-429', required=False, type=float, default=0.0, help='Share of completions answered with 429 and Retry-After (default: 0)')
+    fake_parser.add_argument('--rate-5xx', required=False, type=float, default=0.0, help='Share of completions answered with 500/502/503 (default: 0)')
+    fake_parser.add_argument('--retry-after', required=False, type=float, default=1.0, help='Retry-After seconds sent with injected 429s (default: 1)')
+    fake_parser.add_argument('--responses', required=False, help='JSON file overriding the reply templates ("scenarios", "related", "code", "repair", "fix"; $path, $name, $paths, $functions are substituted)')
+    fake_parser.add_argument('--models', required=False, help='Comma separated model ids served by /models')
+    fake_parser.add_argument('--seed', required=False, type=int, default=0, help='Random seed for latency and error injection (default: 0)')
+
     args = parser.parse_args()
     return parser, args
 
 def process_command_line_args(args:argparse.Namespace, parser:argparse.ArgumentParser):
-    if args.command == 'set-apikey':
-        rich_console.success_string(api_key_utils.set_api_key(args.api_key))
-    elif args.command == 'get-apikey':
-        msg = api_key_utils.get_api_key_for_user()
-        (rich_console.error_string if msg.startswith("❌") else rich_console.info_string)(msg)
-    elif args.command == 'delete-apikey':
-        msg = api_key_utils.delete_api_key()
-        (rich_console.error_string if msg.startswith("❌") else rich_console.success_string)(msg)
-    elif args.command == 'set-max-attempts':
-        rich_console.success_string(api_key_utils.set_max_attempts(args.value))
-    elif args.command == 'get-max-attempts':
-        rich_console.info_string(f"♻️ OpenRouter Max Attempts : {api_key_utils.get_max_attempts()}")
-
-    elif args.command == 'run':
-        python_venv = None
-        if args.venv_path:
-            python_venv = args.venv_path
-        if not api_key_utils.check_api_key():
-            rich_console.error_string("API key not set. Please set it using --set-apikey.")
-            sys.exit(1)
-        openapi_file_data = FileFunctions.read_json_file(args.openapi_path)
-        if not FileFunctions.validate_open_api(openapi_file_data):
-            rich_console.error_string("Invalid OpenAPI file")
-            sys.exit(1)
-        if not api_key_utils.get_api_key():
-            rich_console.error_string("API key not set. Please set it using --set-apikey.")
-            sys.exit(1)
-        
-        
-        endpoints = ParserFunctions.parse_endpoint_names(openapi_data=openapi_file_data)
-        auth_login_endpoint = OpenRouter.user_selection_fuzzy(given_choices=["[None]"]+endpoints)
-        auth_token_endpoint_prompt = ("User gave this endpoint to get authentication token (login) \n" + ParserFunctions.parse_single_endpoint(openapi_data=openapi_file_data, endpoint_name=auth_login_endpoint)) if auth_login_endpoint else ""
-        rich_console.info_string(f"🔑 auth login endpoint: {auth_login_endpoint}")
-        auth_register_endpoint = OpenRouter.user_selection_fuzzy(given_choices=["[None]"]+endpoints)
-        auth_register_endpoint_prompt = ("User gave this endpoint to register. You don't have a test user instead you have to create one using this endpoint \n" + ParserFunctions.parse_single_endpoint(openapi_data=openapi_file_data, endpoint_name=auth_register_endpoint)) if auth_register_endpoint else ""
-        rich_console.info_string(f"📋 auth_register_endpoint: {auth_register_endpoint}")
-        
-        model_list = OpenRouter.get_openrouter_models(api_key=api_key_utils.get_api_key())
-        if not model_list:
-            rich_console.error_string("🤖 OpenRouter Error: No models found.")
-            sys.exit(1)
-        else:
-            chosen = OpenRouter.select_model(model_list)
-            rich_console.model_selection_result(chosen)
-
-        parsed_open_api_data = ParserFunctions.parse_open_api(openapi_data=openapi_file_data, api_key=api_key_utils.get_api_key(), open_router_models=chosen)
-        test_scenarios = OpenRouter.convert_scenarios_dict_to_list(scenarios_dict=json.loads(parsed_open_api_data))
-        
-        chosen_tests = OpenRouter.select_scenarios_to_run(test_scenarios)
-        generated_code = ""
-        for chosen_test in tqdm(chosen_tests, desc="🤖 Generating Test Code", unit="endpoint"):
-            relative_paths = ParserFunctions.parse_string_to_list(chosen_test["relative_paths"])
-
-            if relative_paths:
-                related_endpoints_parsed_data = "\n\nRelated Endpoints:\n"
-                for relative_path in relative_paths:
-                    related_endpoints_parsed_data += ParserFunctions.parse_single_endpoint(openapi_data=openapi_file_data, endpoint_name=relative_path)
-
-            test_prompt = FastApiPrompts.pytest_test_write_prompt + "\n\nTest scenario:\n" + chosen_test["test_scenario"] + "\n\n" + "open api data of the project:\n" + chosen_test["parsed_info"] + "\n\n" +"tree struct of the project:\n" + FileFunctions.get_tree_output(args.project_path, ignore_dirs=[".git", "__pycache__", ".idea", ".vscode", ".pytest_cache", ".mypy_cache"]) + "\n\n" + "Auth token endpoint:\n" + "\n" + auth_token_endpoint_prompt + "\nAuth register endpoint:\n" + auth_register_endpoint_prompt + related_endpoints_parsed_data
-
-            code_from_ai = OpenRouter.send_request_to_openrouter(api_key=api_key_utils.get_api_key(), model_name=chosen, prompt=test_prompt)
-            test_runner_result =FastAPITestRunner. attempt_test_fix_loop(api_key=api_key_utils.get_api_key(),
-                                                       model_name=chosen,
-                                                       test_code=code_from_ai,
-                                                       parsed_openapi_endpoint_data=chosen_test["parsed_info"],
-                                                       test_scenario=chosen_test["test_scenario"],
-                                                       tree_struct=FileFunctions.get_tree_output(args.project_path, ignore_dirs=[".git", "__pycache__", ".idea", ".vscode", ".pytest_cache", ".mypy_cache"]),
-                                                       project_path=str(args.project_path),
-                                                       auth_token_endpoint_prompt=auth_token_endpoint_prompt,
-                                                       auth_register_endpoint_prompt=auth_register_endpoint_prompt,
-                                                       related_endpoints_prompt=related_endpoints_parsed_data,
-                                                       max_attempts=api_key_utils.get_max_attempts(),
-                                                       python_venv=python_venv)
-            generated_code += test_runner_result + "\n"
-        rich_console.step_info("finalizing the test code")
-        finalized_test_code = FastAPITestRunner.finalize_combined_test_file(
-            api_key=api_key_utils.get_api_key(),
-            model_name=chosen,
-            test_code=generated_code,
-            project_path=str(args.project_path),
-            python_venv=python_venv,
-            max_attempts=api_key_utils.get_max_attempts(),
-        )
-        FileFunctions.append_test_code_to_file(test_code=str(finalized_test_code), project_path=str(args.project_path), filename=args.save_as)
-
-    else:
+    if args.command not in COMMANDS:
         parser.print_help()
+        return
+    module_name, function_name = COMMANDS[args.command]
+    getattr(importlib.import_module(module_name), function_name)(args, parser)
@@ -0,0 +1,7 @@
+from .batch import BatchConfig, BatchRunner, BatchService
+
+__all__ = [
+    "BatchConfig",
+    "BatchRunner",
+    "BatchService",
+]
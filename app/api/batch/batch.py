@@ -0,0 +1,125 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from api.journal import RunJournal
+
+class BatchService:
+    """
+    One service of a batch config: where its spec, project and venv are, which model and auth endpoints to use,
+    and which endpoints to test (`include` / `exclude` are glob patterns over the OpenAPI paths).
+    """
+    def __init__(self, entry: Dict[str, Any], base_dir: Path, default_model: Optional[str]):
+        missing = [key for key in ("openapi_path", "project_path", "save_as") if not entry.get(key)]
+        if missing:
+            raise ValueError(f"Service {entry.get('name', '?')} is missing {', '.join(missing)}")
+        self.openapi_path = str((base_dir / entry["openapi_path"]).resolve())
+        self.project_path = str((base_dir / entry["project_path"]).resolve())
+        self.name = entry.get("name") or Path(self.project_path).name
+        self.save_as = entry["save_as"]
+        self.venv_path = str((base_dir / entry["venv_path"]).resolve()) if entry.get("venv_path") else None
+        self.model = entry.get("model") or default_model
+        if not self.model:
+            raise ValueError(f"Service {self.name} has no model and the config has no default model")
+        self.auth_login_endpoint = entry.get("auth_login_endpoint")
+        self.auth_register_endpoint = entry.get("auth_register_endpoint")
+        self.include = entry.get("include") or ["*"]
+        self.exclude = entry.get("exclude") or []
+
+    def select_endpoints(self, paths: List[str]) -> List[str]:
+        return [
+            path for path in paths
+            if any(fnmatch(path, pattern) for pattern in self.include) and not any(fnmatch(path, pattern) for pattern in self.exclude)
+        ]
+
+    def prepare_journal(self, journal: RunJournal) -> None:
+        """
+        Writes the answers of the interactive prompts into the journal, so the run never has to ask.
+        """
+        values = {
+            "openapi_path": self.openapi_path,
+            "project_path": self.project_path,
+            "save_as": self.save_as,
+            "venv_path": self.venv_path,
+            "auth_login_endpoint": self.auth_login_endpoint,
+            "auth_register_endpoint": self.auth_register_endpoint,
+            "model": self.model,
+        }
+        for key, value in values.items():
+            if not journal.has(key):
+                journal.set(key, value)
+
+class BatchConfig:
+    """
+    JSON batch config: global limits plus a list of services. Relative paths are resolved against the config file.
+    """
+    def __init__(self, path: str, default_model: Optional[str] = None):
+        config_path = Path(path).resolve()
+        try:
+            data = json.loads(config_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Cannot read batch config {path}: {e}")
+        if not data.get("services"):
+            raise ValueError("Batch config has no services")
+        self.max_services = int(data.get("max_services", 2))
+        self.llm_concurrency = int(data.get("llm_concurrency", 4))
+        self.test_concurrency = int(data.get("test_concurrency", 2))
+        if min(self.max_services, self.llm_concurrency, self.test_concurrency) < 1:
+            raise ValueError("max_services, llm_concurrency and test_concurrency must be at least 1")
+        self.services = [BatchService(entry, config_path.parent, data.get("model") or default_model) for entry in data["services"]]
+        names = [service.name for service in self.services]
+        if len(set(names)) != len(names):
+            raise ValueError("Service names in the batch config must be unique")
+
+class BatchRunner:
+    """
+    Runs the services of a batch config concurrently (up to `max_services` at a time), each with its own journal
+    in `journal_dir`, and collects a summary per service. A failing service doesn't stop the others.
+    """
+    def __init__(self, config: BatchConfig, run_service: Callable[[BatchService, RunJournal], None], journal_dir: Path):
+        self.config = config
+        self.run_service = run_service
+        self.journal_dir = Path(journal_dir)
+
+    def run_one(self, service: BatchService) -> Dict[str, Any]:
+        journal = RunJournal(self.journal_dir / f"{service.name}.jsonl")
+        started_at = time.monotonic()
+        error = ""
+        if not journal.get("saved"):
+            service.prepare_journal(journal)
+            try:
+                self.run_service(service, journal)
+            except KeyboardInterrupt:
+                raise
+            except BaseException as e:
+                # sys.exit() from a failed OpenRouter call ends up here too; keep the other services going.
+                error = f"{type(e).__name__}: {e}"
+        return self.summarize(service, journal, error, time.monotonic() - started_at)
+
+    @staticmethod
+    def summarize(service: BatchService, journal: RunJournal, error: str, seconds: float) -> Dict[str, Any]:
+        statuses = [journal.test_entry(test["index"], "fixed") for test in journal.get("chosen_tests", [])]
+        passed = sum(1 for status in statuses if status and status["status"] == "passed")
+        if journal.get("saved"):
+            # Giving up still saves the code, commented out; a service whose final loop or every endpoint gave up
+            # saved nothing that runs.
+            gave_up = journal.get("finalized_status", "passed") != "passed" or (statuses and not passed)
+            status = "gave_up" if gave_up else "saved"
+        else:
+            status = "failed" if error else "incomplete"
+        return {
+            "service": service.name,
+            "status": status,
+            "endpoints": len(statuses),
+            "passed": passed,
+            "gave_up": sum(1 for status in statuses if status and status["status"] != "passed"),
+            "seconds": round(seconds, 1),
+            "journal": str(journal.path),
+            "error": error,
+        }
+
+    def run(self) -> List[Dict[str, Any]]:
+        with ThreadPoolExecutor(max_workers=self.config.max_services) as executor:
+            return list(executor.map(self.run_one, self.config.services))
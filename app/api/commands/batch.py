@@ -0,0 +1,66 @@
+import sys
+import time
+import argparse
+from functools import partial
+from config.settings import Settings
+from api.openrouter.http_client import configure_http_client
+from api.openrouter.rate_limiter import configure_request_scheduler
+from api.openrouter.response_cache import configure_response_cache
+from api.openrouter.streaming import configure_streaming, get_completion_metrics
+from api.parser.parser import ParserFunctions
+from api.test_runner.test_runner import FastAPITestRunner
+from api.file_functions.file_functions import FileFunctions
+from api.journal import RunJournal
+from api.batch import BatchConfig, BatchRunner, BatchService
+from config.cache_paths import get_cache_dir
+from config.rich_console import rich_console
+from .common import load_settings
+from .run import run_journaled
+
+def run_batch_service(service: BatchService, journal: RunJournal, options: argparse.Namespace, settings: Settings):
+    """
+    Runs one service of a batch: its endpoints are chosen by the config filters and every other answer is already in the journal.
+    """
+    openapi_file_data = FileFunctions.read_json_file(service.openapi_path)
+    if not FileFunctions.validate_open_api(openapi_file_data):
+        raise ValueError(f"Invalid OpenAPI file: {service.openapi_path}")
+    endpoints = service.select_endpoints(ParserFunctions.parse_endpoint_names(openapi_data=openapi_file_data))
+    rich_console.info_string(f"📦 {service.name}: {len(endpoints)} endpoints selected")
+    service_args = argparse.Namespace(**vars(options), openapi_path=service.openapi_path, project_path=service.project_path, save_as=service.save_as)
+    run_journaled(service_args, journal, settings, python_venv=service.venv_path, endpoints=endpoints)
+
+def batch(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    settings = load_settings(require_api_key=True)
+    try:
+        config = BatchConfig(args.config, default_model=settings.default_model)
+    except ValueError as e:
+        rich_console.error_string(str(e))
+        sys.exit(1)
+    configure_http_client(base_url=settings.base_url, max_connections=max(20, config.llm_concurrency * 2))
+    configure_request_scheduler(max_retries=args.max_retries, max_in_flight=config.llm_concurrency)
+    configure_streaming(enabled=args.stream)
+    response_cache = configure_response_cache(enabled=not args.no_cache)
+    FastAPITestRunner.configure_interactive(False)
+    FastAPITestRunner.configure_test_slots(config.test_concurrency)
+    journal_dir = args.journal_dir or get_cache_dir("journals", f"batch-{time.strftime('%Y%m%d-%H%M%S')}")
+    rich_console.info_string(f"📓 Batch journals: {journal_dir} (re-run with --journal-dir to continue)")
+    options = argparse.Namespace(
+        concurrency=config.llm_concurrency,
+        pipeline=True,
+        test_workers=config.test_concurrency,
+        final_workers=args.final_workers,
+        context_budget=args.context_budget,
+        batch_tokens=args.batch_tokens,
+        llm_related_endpoints=False,
+    )
+    try:
+        results = BatchRunner(config, partial(run_batch_service, options=options, settings=settings), journal_dir).run()
+    finally:
+        FastAPITestRunner.configure_interactive(True)
+        FastAPITestRunner.configure_test_slots(None)
+    rich_console.summary_table("Batch summary", results)
+    if response_cache.enabled:
+        rich_console.info_string(response_cache.stats_string())
+    rich_console.info_string(get_completion_metrics().summary_string())
+    if any(result["status"] != "saved" for result in results):
+        sys.exit(1)
@@ -0,0 +1,17 @@
+import sys
+from config.settings import Settings
+from config.rich_console import rich_console
+
+def load_settings(require_api_key: bool = False) -> Settings:
+    """
+    Resolves the settings once for the command; everything below gets them passed in instead of asking the keyring.
+    """
+    try:
+        settings = Settings.load()
+    except ValueError as e:
+        rich_console.error_string(str(e))
+        sys.exit(1)
+    if require_api_key and not settings.api_key:
+        rich_console.error_string("API key not set. Please set it using --set-apikey, TESTPILOTAI_API_KEY or the config file.")
+        sys.exit(1)
+    return settings
@@ -0,0 +1,51 @@
+import json
+import sys
+from api.openrouter.fake_server import FakeOpenRouterServer, LatencyModel
+from config.rich_console import rich_console
+
+def load_responses(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            responses = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        rich_console.error_string(f"Cannot read response templates {path}: {e}")
+        sys.exit(1)
+    if not isinstance(responses, dict) or not all(isinstance(value, str) for value in responses.values()):
+        rich_console.error_string(f"{path} must be a JSON object of template strings")
+        sys.exit(1)
+    return responses
+
+def fake_openrouter(args, parser):
+    try:
+        latency = LatencyModel.parse(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+    if not 0 <= args.rate_429 + args.rate_5xx <= 1:
+        parser.error("--rate-429 and --rate-5xx must be between 0 and 1 together")
+    try:
+        server = FakeOpenRouterServer(
+            host=args.host,
+            port=args.port,
+            latency=latency,
+            token_delay=args.token_delay,
+            chunk_chars=args.chunk_chars,
+            rate_429=args.rate_429,
+            rate_5xx=args.rate_5xx,
+            retry_after=args.retry_after,
+            responses=load_responses(args.responses) if args.responses else None,
+            models=[model.strip() for model in args.models.split(",") if model.strip()] if args.models else None,
+            seed=args.seed,
+        )
+    except OSError as e:
+        rich_console.error_string(f"Cannot listen on {args.host}:{args.port}: {e}")
+        sys.exit(1)
+    rich_console.success_string(f"Fake OpenRouter listening on {server.base_url} (latency {latency}, 429 rate {args.rate_429:g}, 5xx rate {args.rate_5xx:g})")
+    rich_console.info_string(f"Point testpilotai at it with: export TESTPILOTAI_BASE_URL={server.base_url} TESTPILOTAI_API_KEY=fake")
+    rich_console.info_string(f"Request and error counts: {server.stats_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        rich_console.info_string(f"Served: {json.dumps(server.stats_snapshot())}")
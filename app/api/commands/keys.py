@@ -0,0 +1,21 @@
+from config import api_key_utils
+from config.rich_console import rich_console
+from .common import load_settings
+
+def set_apikey(args, parser):
+    rich_console.success_string(api_key_utils.set_api_key(args.api_key))
+
+def get_apikey(args, parser):
+    msg = api_key_utils.get_api_key_for_user()
+    (rich_console.error_string if msg.startswith("❌") else rich_console.info_string)(msg)
+
+def delete_apikey(args, parser):
+    msg = api_key_utils.delete_api_key()
+    (rich_console.error_string if msg.startswith("❌") else rich_console.success_string)(msg)
+
+def set_max_attempts(args, parser):
+    rich_console.success_string(api_key_utils.set_max_attempts(args.value))
+
+def get_max_attempts(args, parser):
+    settings = load_settings()
+    rich_console.info_string(f"♻️ OpenRouter Max Attempts : {settings.max_attempts} ({settings.sources.get('max_attempts', 'default')})")
@@ -0,0 +1,11 @@
+from api.openrouter.http_client import configure_http_client
+from api.openrouter.model_catalogue import get_model_catalogue
+from api.openrouter.openrouter import OpenRouter
+from config.rich_console import rich_console
+from .common import load_settings
+
+def refresh_models(args, parser):
+    settings = load_settings(require_api_key=True)
+    configure_http_client(base_url=settings.base_url)
+    model_list = OpenRouter.get_openrouter_models(api_key=settings.api_key, force_refresh=True)
+    rich_console.success_string(f"Model catalogue updated: {len(model_list)} models ({get_model_catalogue().cache_file})")
@@ -0,0 +1,310 @@
+from tqdm import tqdm
+import os
+import sys
+import argparse
+import json
+from functools import partial
+from config.settings import Settings
+from api.openrouter.openrouter import OpenRouter
+from api.openrouter.http_client import configure_http_client
+from api.openrouter.model_catalogue import get_model_catalogue
+from api.openrouter.rate_limiter import configure_request_scheduler
+from api.openrouter.response_cache import configure_response_cache
+from api.openrouter.streaming import code_block_complete, configure_streaming, get_completion_metrics
+from api.openrouter.tokens import estimate_tokens
+from api.prompts.prompts import FastApiPrompts
+from api.prompts.context_assembler import DEFAULT_CONTEXT_TOKENS, ContextAssembler
+from api.parser.dependency_graph import EndpointDependencyGraph
+from api.parser.parser import ParserFunctions
+from api.test_runner.test_runner import FIX_PASSED, FastAPITestRunner
+from api.file_functions.file_functions import FileFunctions
+from api.pipeline import PipelineStage, StagePipeline
+from api.journal import RunJournal, default_journal_path
+from config.rich_console import rich_console
+from .common import load_settings
+
+IGNORED_TREE_DIRS = [".git", "__pycache__", ".idea", ".vscode", ".pytest_cache", ".mypy_cache", "test_runner_*.py"]
+
+def build_related_endpoints(openapi_file_data: dict, chosen_test: dict) -> list:
+    """
+    Rendered related endpoints of a scenario, without duplicates or the endpoint itself, most relevant first.
+    """
+    relative_paths = [path for path in dict.fromkeys(ParserFunctions.parse_string_to_list(chosen_test["relative_paths"])) if isinstance(path, str) and path != chosen_test["endpoint"]]
+    graph = EndpointDependencyGraph.for_spec(openapi_file_data)
+    if chosen_test["endpoint"] in graph.features:
+        relative_paths.sort(key=lambda path: -graph.score(chosen_test["endpoint"], path) if path in graph.features else 0)
+    return [ParserFunctions.parse_single_endpoint(openapi_data=openapi_file_data, endpoint_name=relative_path) for relative_path in relative_paths]
+
+def build_related_endpoints_prompt(related_endpoints: list) -> str:
+    return ("\n\nRelated Endpoints:\n" + "".join(related_endpoints)) if related_endpoints else ""
+
+_app_entrypoints = {}
+
+def build_tree_context(project_path: str, context_budget: int) -> str:
+    """
+    Project tree for the prompts. When the full tree would take more than a quarter of the context budget,
+    only the part around the FastAPI app entrypoint is expanded.
+    """
+    tree_struct = FileFunctions.get_tree_output(project_path, ignore_dirs=IGNORED_TREE_DIRS)
+    if estimate_tokens(tree_struct) <= context_budget // 4:
+        return tree_struct
+    if project_path not in _app_entrypoints:
+        _app_entrypoints[project_path] = FileFunctions.find_app_entrypoint(project_path, ignore_dirs=IGNORED_TREE_DIRS)
+    entrypoint = _app_entrypoints[project_path]
+    focus = os.path.dirname(entrypoint) if entrypoint else "."
+    return FileFunctions.get_tree_output(project_path, ignore_dirs=IGNORED_TREE_DIRS, focus=focus or ".")
+
+def build_test_prompt(chosen_test: dict, related_endpoints: list, tree_struct: str, auth_token_endpoint_prompt: str, auth_register_endpoint_prompt: str, context_budget: int) -> str:
+    assembler = ContextAssembler(budget_tokens=context_budget)
+    assembler.add(FastApiPrompts.pytest_test_write_prompt, priority=None, deduplicate=False)
+    assembler.add(chosen_test["test_scenario"], title="Test scenario:", priority=None, truncate="head", deduplicate=False)
+    assembler.add(chosen_test["parsed_info"], title="open api data of the project:", priority=None, truncate="head")
+    assembler.add(auth_token_endpoint_prompt or "Not provided", title="Auth token endpoint:", priority=3, deduplicate=bool(auth_token_endpoint_prompt))
+    assembler.add(auth_register_endpoint_prompt or "Not provided", title="Auth register endpoint:", priority=3, deduplicate=bool(auth_register_endpoint_prompt))
+    assembler.add(tree_struct, title="tree struct of the project:", priority=2, truncate="head")
+    for related_endpoint in related_endpoints:
+        assembler.add(related_endpoint, title="Related Endpoint:", priority=1)
+    return assembler.build()
+
+def generate_test_code(chosen_test: dict, openapi_file_data: dict, project_path: str, model_name: str, auth_token_endpoint_prompt: str, auth_register_endpoint_prompt: str, api_key: str, context_budget: int = DEFAULT_CONTEXT_TOKENS) -> dict:
+    """
+    Code stage of the run: asks the model for the first version of the test code of a chosen scenario.
+    """
+    related_endpoints = build_related_endpoints(openapi_file_data=openapi_file_data, chosen_test=chosen_test)
+    test_prompt = build_test_prompt(
+        chosen_test=chosen_test,
+        related_endpoints=related_endpoints,
+        tree_struct=build_tree_context(project_path, context_budget),
+        auth_token_endpoint_prompt=auth_token_endpoint_prompt,
+        auth_register_endpoint_prompt=auth_register_endpoint_prompt,
+        context_budget=context_budget,
+    )
+
+    code_from_ai = OpenRouter.send_request_to_openrouter(api_key=api_key, model_name=model_name, prompt=test_prompt, stop_when=code_block_complete)
+    return {**chosen_test, "related_endpoints_prompt": build_related_endpoints_prompt(related_endpoints), "test_code": code_from_ai}
+
+def run_test_fix_loop(generated_test: dict, project_path: str, model_name: str, auth_token_endpoint_prompt: str, auth_register_endpoint_prompt: str, api_key: str, max_attempts: int, python_venv: str = None, context_budget: int = DEFAULT_CONTEXT_TOKENS, on_attempt=None) -> tuple:
+    """
+    Run and fix stage of the run: executes the generated test code and lets the model fix it until it passes.
+    Returns the test code and the status the fix loop ended with.
+    """
+    test_code, status = FastAPITestRunner.attempt_test_fix_loop(api_key=api_key,
+                                               model_name=model_name,
+                                               test_code=generated_test["test_code"],
+                                               parsed_openapi_endpoint_data=generated_test["parsed_info"],
+                                               test_scenario=generated_test["test_scenario"],
+                                               tree_struct=build_tree_context(project_path, context_budget),
+                                               project_path=project_path,
+                                               auth_token_endpoint_prompt=auth_token_endpoint_prompt,
+                                               auth_register_endpoint_prompt=auth_register_endpoint_prompt,
+                                               related_endpoints_prompt=generated_test["related_endpoints_prompt"],
+                                               max_attempts=max_attempts,
+                                               python_venv=python_venv,
+                                               context_budget=context_budget,
+                                               on_attempt=on_attempt)
+    return test_code or "", status
+
+def journaled_code_stage(chosen_test: dict, journal: RunJournal, generate_code_for_test) -> dict:
+    """
+    Code stage that reuses the generated code recorded in the journal.
+    """
+    generated = journal.test_entry(chosen_test["index"], "generated")
+    if generated is not None:
+        return generated["test"]
+    generated_test = generate_code_for_test(chosen_test)
+    journal.record_test(chosen_test["index"], "generated", test=generated_test)
+    return generated_test
+
+def journaled_fix_stage(generated_test: dict, journal: RunJournal, fix_test) -> str:
+    """
+    Run and fix stage that skips endpoints the journal has finished and continues others from their last attempt.
+    """
+    index = generated_test["index"]
+    fixed = journal.test_entry(index, "fixed")
+    if fixed is not None:
+        return fixed["code"]
+    last_attempt = journal.test_entry(index, "attempt")
+    if last_attempt is not None:
+        generated_test = {**generated_test, "test_code": last_attempt["code"]}
+    test_code, status = fix_test(
+        generated_test,
+        on_attempt=lambda code, report: journal.record_test(index, "attempt", code=code, status=report.summary_string()),
+    )
+    journal.record_test(index, "fixed", endpoint=generated_test["endpoint"], code=test_code, status=status)
+    return test_code
+
+def run_journaled(args: argparse.Namespace, journal: RunJournal, settings: Settings, python_venv: str = None, endpoints: list = None):
+    """
+    The run command. Every user choice and finished stage goes to the journal, and whatever the journal
+    already holds (from an interrupted run or a batch config) is reused instead of being asked for or generated
+    again. With `endpoints`, only those paths get scenarios and all of them are tested without asking.
+    """
+    openapi_file_data = FileFunctions.read_json_file(args.openapi_path)
+    if not FileFunctions.validate_open_api(openapi_file_data):
+        rich_console.error_string("Invalid OpenAPI file")
+        sys.exit(1)
+    endpoint_names = ParserFunctions.parse_endpoint_names(openapi_data=openapi_file_data)
+    if not journal.has("auth_login_endpoint"):
+        journal.set("auth_login_endpoint", OpenRouter.user_selection_fuzzy(given_choices=["[None]"]+endpoint_names))
+    auth_login_endpoint = journal.get("auth_login_endpoint")
+    auth_token_endpoint_prompt = ("User gave this endpoint to get authentication token (login) \n" + ParserFunctions.parse_single_endpoint(openapi_data=openapi_file_data, endpoint_name=auth_login_endpoint)) if auth_login_endpoint else ""
+    rich_console.info_string(f"🔑 auth login endpoint: {auth_login_endpoint}")
+    if not journal.has("auth_register_endpoint"):
+        journal.set("auth_register_endpoint", OpenRouter.user_selection_fuzzy(given_choices=["[None]"]+endpoint_names))
+    auth_register_endpoint = journal.get("auth_register_endpoint")
+    auth_register_endpoint_prompt = ("User gave this endpoint to register. You don't have a test user instead you have to create one using this endpoint \n" + ParserFunctions.parse_single_endpoint(openapi_data=openapi_file_data, endpoint_name=auth_register_endpoint)) if auth_register_endpoint else ""
+    rich_console.info_string(f"📋 auth_register_endpoint: {auth_register_endpoint}")
+
+    if not journal.has("model"):
+        model_list = OpenRouter.get_openrouter_models(api_key=settings.api_key)
+        if not model_list:
+            rich_console.error_string("🤖 OpenRouter Error: No models found.")
+            sys.exit(1)
+        journal.set("model", OpenRouter.select_model(model_list))
+    chosen = journal.get("model")
+    rich_console.model_selection_result(chosen)
+    context_budget = get_model_catalogue().prompt_budget(chosen, args.context_budget)
+    if context_budget < args.context_budget:
+        rich_console.info_string(f"📏 Context budget lowered to {context_budget} tokens to fit {chosen}")
+
+    if not journal.has("scenarios"):
+        journal.set("scenarios", ParserFunctions.parse_open_api(openapi_data=openapi_file_data, api_key=settings.api_key, open_router_models=chosen, concurrency=args.concurrency, refine_related_with_llm=args.llm_related_endpoints, batch_tokens=args.batch_tokens, paths=endpoints))
+    test_scenarios = OpenRouter.convert_scenarios_dict_to_list(scenarios_dict=json.loads(journal.get("scenarios")))
+
+    if not journal.has("chosen_tests"):
+        chosen_tests = test_scenarios if endpoints is not None else OpenRouter.select_scenarios_to_run(test_scenarios)
+        journal.set("chosen_tests", [{**chosen_test, "index": index} for index, chosen_test in enumerate(chosen_tests)])
+    chosen_tests = journal.get("chosen_tests")
+    finished = sum(1 for chosen_test in chosen_tests if journal.test_entry(chosen_test["index"], "fixed") is not None)
+    if finished:
+        rich_console.info_string(f"♻️ {finished}/{len(chosen_tests)} endpoints already finished in the journal")
+
+    generate_code_for_test = partial(
+        journaled_code_stage,
+        journal=journal,
+        generate_code_for_test=partial(
+            generate_test_code,
+            openapi_file_data=openapi_file_data,
+            project_path=str(args.project_path),
+            model_name=chosen,
+            auth_token_endpoint_prompt=auth_token_endpoint_prompt,
+            auth_register_endpoint_prompt=auth_register_endpoint_prompt,
+            api_key=settings.api_key,
+            context_budget=context_budget,
+        ),
+    )
+    fix_test = partial(
+        journaled_fix_stage,
+        journal=journal,
+        fix_test=partial(
+            run_test_fix_loop,
+            project_path=str(args.project_path),
+            model_name=chosen,
+            auth_token_endpoint_prompt=auth_token_endpoint_prompt,
+            auth_register_endpoint_prompt=auth_register_endpoint_prompt,
+            api_key=settings.api_key,
+            max_attempts=settings.max_attempts,
+            python_venv=python_venv,
+            context_budget=context_budget,
+        ),
+    )
+
+    generated_code = ""
+    if args.pipeline:
+        pipeline = StagePipeline(
+            stages=[
+                PipelineStage(name="code", func=generate_code_for_test, workers=args.concurrency),
+                PipelineStage(name="test", func=fix_test, workers=args.test_workers),
+            ],
+            queue_size=max(args.concurrency, args.test_workers) * 2,
+        )
+        with tqdm(total=len(chosen_tests), desc="🤖 Generating Test Code", unit="endpoint") as progress:
+            test_runner_results = pipeline.run(chosen_tests, on_item_done=lambda index, result: progress.update(1))
+        for test_runner_result in test_runner_results:
+            generated_code += test_runner_result + "\n"
+    else:
+        for chosen_test in tqdm(chosen_tests, desc="🤖 Generating Test Code", unit="endpoint"):
+            generated_code += fix_test(generate_code_for_test(chosen_test)) + "\n"
+
+    if not journal.has("finalized_test_code"):
+        rich_console.step_info("finalizing the test code")
+        finalized_test_code, finalized_status = FastAPITestRunner.finalize_combined_test_file(
+            api_key=settings.api_key,
+            model_name=chosen,
+            test_code=generated_code,
+            project_path=str(args.project_path),
+            python_venv=python_venv,
+            max_attempts=settings.max_attempts,
+            context_budget=context_budget,
+            workers=args.final_workers,
+        )
+        # The status goes first: a journal with the code always knows how the final loop ended.
+        journal.set("finalized_status", finalized_status)
+        journal.set("finalized_test_code", finalized_test_code or "")
+    if not journal.has("save_offset"):
+        save_path = os.path.join(str(args.project_path), args.save_as)
+        journal.set("save_offset", os.path.getsize(save_path) if os.path.exists(save_path) else 0)
+    FileFunctions.append_test_code_to_file(test_code=str(journal.get("finalized_test_code")), project_path=str(args.project_path), filename=args.save_as, offset=journal.get("save_offset"))
+    journal.set("saved", True)
+    if journal.get("finalized_status") != FIX_PASSED:
+        rich_console.warning_string(f"⚠️ The final fix loop ended as {journal.get('finalized_status')}: the saved tests don't pass.")
+
+def run(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    python_venv = None
+    if args.venv_path:
+        python_venv = args.venv_path
+    if args.concurrency < 1 or args.test_workers < 1 or args.final_workers < 1:
+        rich_console.error_string("--concurrency, --test-workers and --final-workers must be at least 1.")
+        sys.exit(1)
+    settings = load_settings(require_api_key=True)
+    configure_http_client(
+        base_url=settings.base_url,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        http2=args.http2,
+        max_connections=max(20, args.concurrency * 2),
+    )
+    configure_request_scheduler(
+        max_retries=args.max_retries,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+    )
+    configure_streaming(enabled=args.stream)
+    FastAPITestRunner.configure_warm_workers(
+        enabled=args.warm_worker,
+        size=args.test_workers if args.pipeline else 1,
+        max_runs=args.worker_max_runs,
+    )
+    response_cache = configure_response_cache(
+        enabled=not args.no_cache,
+        refresh=args.refresh_cache,
+        max_size_bytes=args.cache_max_mb * 1024 * 1024,
+    )
+    if args.resume:
+        if not os.path.exists(args.resume):
+            rich_console.error_string(f"Journal not found: {args.resume}")
+            sys.exit(1)
+        journal = RunJournal(args.resume)
+        if journal.get("saved"):
+            rich_console.success_string(f"This run already finished and was saved to {journal.get('save_as')}")
+            return
+        args.openapi_path, args.project_path, args.save_as = journal.get("openapi_path"), journal.get("project_path"), journal.get("save_as")
+        python_venv = journal.get("venv_path")
+        rich_console.info_string(f"♻️ Resuming run from {args.resume}")
+    else:
+        if not (args.openapi_path and args.project_path and args.save_as):
+            parser.error("run requires --openapi-path, --project-path and --save-as unless --resume is given")
+        journal = RunJournal(args.journal or default_journal_path(args.openapi_path))
+        for key, value in (("openapi_path", os.path.abspath(args.openapi_path)), ("project_path", os.path.abspath(args.project_path)), ("save_as", args.save_as), ("venv_path", python_venv and os.path.abspath(python_venv))):
+            journal.set(key, value)
+        rich_console.info_string(f"📓 Run journal: {journal.path} (continue an interrupted run with --resume)")
+    try:
+        run_journaled(args, journal, settings, python_venv)
+    except (KeyboardInterrupt, SystemExit):
+        rich_console.warning_string(f"Run interrupted. Continue it with: testpilotai run --resume {journal.path}")
+        raise
+    finally:
+        FastAPITestRunner.configure_warm_workers(enabled=False)
+    if response_cache.enabled:
+        rich_console.info_string(response_cache.stats_string())
+    rich_console.info_string(get_completion_metrics().summary_string())
@@ -1,15 +1,22 @@
 import json
-import subprocess
 import os
+from typing import Optional
 from config.rich_console import rich_console
+from .tree_scanner import ProjectTreeScanner
 
 class FileFunctions:
     def __init__(self):
         pass
-    def append_test_code_to_file(test_code: str, project_path: str, filename: str = "test_runner.py"):
+    def append_test_code_to_file(test_code: str, project_path: str, filename: str = "test_runner.py", offset: Optional[int] = None):
+        """
+        With `offset` (the file size before the first save), whatever an earlier, interrupted save wrote past it is
+        dropped first, so saving the same run again doesn't duplicate its tests.
+        """
         file_path = os.path.join(project_path, filename)
         
         with open(file_path, "a", encoding="utf-8") as f:
+            if offset is not None and f.tell() > offset:
+                f.truncate(offset)
             f.write("\n\n")
             f.write(test_code)
         
@@ -40,13 +47,28 @@ class FileFunctions:
             print(f"Unexpected error: {e}")
             return False
         
-    def get_tree_output(path, ignore_dirs=None):
+    def get_tree_output(path, ignore_dirs=None, max_depth: int = 8, max_entries: int = 2000, focus: str = None):
         ignore_dirs = ignore_dirs or []
-        cmd = ["tree", "-I", "|".join(ignore_dirs), path]
-        try:
-            output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
-            return output.decode("utf-8")
-        except FileNotFoundError:
-            return "Error --> 'tree' command is not installed. Please install it using: sudo apt install tree"
-        except subprocess.CalledProcessError as e:
-            return f"Error --> An error occurred while executing the tree command: {e}"
\ No newline at end of file
+        if not os.path.isdir(path):
+            return f"Error --> Project path is not a directory: {path}"
+        return ProjectTreeScanner.render(path, ignore_dirs=ignore_dirs, max_depth=max_depth, max_entries=max_entries, focus=focus)
+
+    def find_app_entrypoint(project_path: str, ignore_dirs=None, max_depth: int = 4) -> Optional[str]:
+        """
+        Relative path of the first module creating the FastAPI app (shallowest first), or None.
+        """
+        ignore_dirs = set(ignore_dirs or []) | {".venv", "venv", "env", "node_modules", "site-packages"}
+        root = os.path.abspath(project_path)
+        candidates = []
+        for directory, dirnames, filenames in os.walk(root):
+            depth = 0 if directory == root else os.path.relpath(directory, root).count(os.sep) + 1
+            dirnames[:] = [name for name in dirnames if name not in ignore_dirs and depth < max_depth]
+            candidates.extend((depth, os.path.join(directory, filename)) for filename in filenames if filename.endswith(".py"))
+        for _, file_path in sorted(candidates):
+            try:
+                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                    if "FastAPI(" in f.read():
+                        return os.path.relpath(file_path, root)
+            except OSError:
+                continue
+        return None
\ No newline at end of file
@@ -0,0 +1,177 @@
+import fnmatch
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class GitIgnoreRules:
+    """
+    Minimal .gitignore matcher: supports comments, negation (!), directory-only patterns (trailing /),
+    anchored patterns (containing /) and wildcards. Rules of nested .gitignore files apply below their directory.
+    """
+    def __init__(self, rules: Optional[List[Tuple[str, str, bool, bool, bool]]] = None):
+        # (base_dir, pattern, negated, directory_only, anchored)
+        self.rules = rules or []
+
+    def extended(self, directory: str, gitignore_path: str) -> "GitIgnoreRules":
+        try:
+            with open(gitignore_path, "r", encoding="utf-8", errors="ignore") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return self
+        rules = list(self.rules)
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            directory_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if line:
+                rules.append((directory, line, negated, directory_only, anchored))
+        return GitIgnoreRules(rules)
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        ignored = False
+        name = os.path.basename(path)
+        for base_dir, pattern, negated, directory_only, anchored in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if anchored:
+                matched = fnmatch.fnmatch(os.path.relpath(path, base_dir).replace(os.sep, "/"), pattern)
+            else:
+                matched = fnmatch.fnmatch(name, pattern)
+            if matched:
+                ignored = not negated
+        return ignored
+
+class ProjectTreeScanner:
+    """
+    Pure-Python replacement for the `tree` command built on os.scandir. Results are memoized per run and reused
+    until a scanned directory's listing or a .gitignore file changes. Files matching `ignore_dirs` (like the test
+    runner's temporary test_runner_*.py files) don't count as a change.
+    """
+    # Stamps map a scanned directory to (mtime, names it lists) and a .gitignore file to (mtime, None).
+    _cache: Dict[tuple, Tuple[str, Dict[str, Tuple[float, Optional[Tuple[str, ...]]]]]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def listed_names(entries: Iterable[os.DirEntry], ignore_dirs: Iterable[str]) -> Tuple[str, ...]:
+        return tuple(sorted(entry.name for entry in entries if not any(fnmatch.fnmatch(entry.name, pattern) for pattern in ignore_dirs)))
+
+    @staticmethod
+    def is_fresh(stamps: Dict[str, Tuple[float, Optional[Tuple[str, ...]]]], ignore_dirs: Iterable[str] = ()) -> bool:
+        for path, (mtime, names) in stamps.items():
+            try:
+                current_mtime = os.stat(path).st_mtime
+                if current_mtime == mtime:
+                    continue
+                if names is None:
+                    return False
+                # The directory changed; it only matters if an entry that isn't ignored came or went.
+                with os.scandir(path) as iterator:
+                    if ProjectTreeScanner.listed_names(iterator, ignore_dirs) != names:
+                        return False
+            except OSError:
+                return False
+            stamps[path] = (current_mtime, names)
+        return True
+
+    @staticmethod
+    def render(path: str, ignore_dirs: Iterable[str] = (), max_depth: Optional[int] = 8, max_entries: Optional[int] = 2000, focus: Optional[str] = None) -> str:
+        """
+        With `focus` (a directory relative to `path`), only that directory's subtree and its ancestors are
+        expanded; other directories are listed collapsed.
+        """
+        root = os.path.abspath(path)
+        key = (root, tuple(ignore_dirs), max_depth, max_entries, focus)
+        with ProjectTreeScanner._lock:
+            cached = ProjectTreeScanner._cache.get(key)
+        if cached and ProjectTreeScanner.is_fresh(cached[1], ignore_dirs):
+            return cached[0]
+
+        focus_path = os.path.normpath(os.path.join(root, focus)) if focus else None
+        output, stamps = ProjectTreeScanner.scan(path, root, list(ignore_dirs), max_depth, max_entries, focus_path)
+        with ProjectTreeScanner._lock:
+            ProjectTreeScanner._cache[key] = (output, stamps)
+        return output
+
+    @staticmethod
+    def scan(display_path: str, root: str, ignore_dirs: List[str], max_depth: Optional[int], max_entries: Optional[int], focus_path: Optional[str] = None) -> Tuple[str, Dict[str, Tuple[float, Optional[Tuple[str, ...]]]]]:
+        lines = [display_path]
+        stamps: Dict[str, Tuple[float, Optional[Tuple[str, ...]]]] = {}
+        counts = {"directories": 0, "files": 0, "entries": 0}
+        truncated = False
+
+        def walk(directory: str, prefix: str, depth: int, rules: GitIgnoreRules) -> None:
+            nonlocal truncated
+            try:
+                mtime = os.stat(directory).st_mtime
+                with os.scandir(directory) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                return
+            stamps[directory] = (mtime, ProjectTreeScanner.listed_names(entries, ignore_dirs))
+            gitignore_path = os.path.join(directory, ".gitignore")
+            if any(entry.name == ".gitignore" for entry in entries):
+                try:
+                    stamps[gitignore_path] = (os.stat(gitignore_path).st_mtime, None)
+                except OSError:
+                    pass
+                else:
+                    rules = rules.extended(directory, gitignore_path)
+
+            visible = []
+            for entry in entries:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if any(fnmatch.fnmatch(entry.name, pattern) for pattern in ignore_dirs):
+                    continue
+                if rules.ignored(entry.path, is_dir):
+                    continue
+                visible.append((entry, is_dir))
+            visible.sort(key=lambda item: item[0].name)
+
+            for index, (entry, is_dir) in enumerate(visible):
+                if max_entries is not None and counts["entries"] >= max_entries:
+                    truncated = True
+                    return
+                counts["entries"] += 1
+                last = index == len(visible) - 1
+                name = entry.name
+                if entry.is_symlink():
+                    try:
+                        name += f" -> {os.readlink(entry.path)}"
+                    except OSError:
+                        pass
+                expand = is_dir and (max_depth is None or depth < max_depth) and ProjectTreeScanner.in_focus(entry.path, focus_path)
+                if is_dir and not expand and focus_path:
+                    name += "/ [...]"
+                lines.append(f"{prefix}{'└── ' if last else '├── '}{name}")
+                if is_dir:
+                    counts["directories"] += 1
+                    if expand:
+                        walk(entry.path, prefix + ("    " if last else "│   "), depth + 1, rules)
+                else:
+                    counts["files"] += 1
+
+        walk(root, "", 1, GitIgnoreRules())
+        if truncated:
+            lines.append(f"... (truncated after {max_entries} entries)")
+        lines.append("")
+        lines.append(f"{counts['directories']} directories, {counts['files']} files")
+        return "\n".join(lines) + "\n", stamps
+
+    @staticmethod
+    def in_focus(directory: str, focus_path: Optional[str]) -> bool:
+        if not focus_path:
+            return True
+        # Ancestors of the focus directory, the directory itself and everything below it.
+        return focus_path == directory or focus_path.startswith(directory + os.sep) or directory.startswith(focus_path + os.sep)
+
+    @staticmethod
+    def clear_cache() -> None:
+        with ProjectTreeScanner._lock:
+            ProjectTreeScanner._cache.clear()
@@ -0,0 +1,6 @@
+from .run_journal import RunJournal, default_journal_path
+
+__all__ = [
+    "RunJournal",
+    "default_journal_path",
+]
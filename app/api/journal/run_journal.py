@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from config.cache_paths import get_cache_dir
+
+def default_journal_path(openapi_path: str) -> Path:
+    return get_cache_dir("journals") / f"{time.strftime('%Y%m%d-%H%M%S')}_{Path(openapi_path).stem}.jsonl"
+
+class RunJournal:
+    """
+    Append-only JSON-lines record of a run. Every finished stage is appended and fsynced, so a crash or Ctrl-C
+    loses at most the step in progress; replaying the file gives back the run-level values (spec paths, model,
+    scenarios, chosen endpoints) and the latest state of every endpoint for `run --resume`.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.values: Dict[str, Any] = {}
+        self.tests: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+        if self.path.exists():
+            self.replay()
+
+    def replay(self) -> None:
+        with open(self.path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(-1, os.SEEK_END)
+                cut_off = f.read(1) != b"\n"
+        if size and cut_off:
+            # Terminate a line cut off by a crash so the next entry starts on a line of its own.
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n")
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A half-written last line from a crash; everything before it is intact.
+                    continue
+                self.apply(entry)
+
+    def apply(self, entry: Dict[str, Any]) -> None:
+        if entry["event"] == "value":
+            self.values[entry["key"]] = entry["value"]
+        elif entry["event"] == "test":
+            self.tests.setdefault(entry["index"], {})[entry["stage"]] = entry["data"]
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({**entry, "time": time.time()}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.apply(entry)
+
+    def has(self, key: str) -> bool:
+        return key in self.values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self.append({"event": "value", "key": key, "value": value})
+
+    def test_entry(self, index: int, stage: str) -> Optional[Dict[str, Any]]:
+        return self.tests.get(index, {}).get(stage)
+
+    def record_test(self, index: int, stage: str, **data: Any) -> None:
+        self.append({"event": "test", "index": index, "stage": stage, "data": data})
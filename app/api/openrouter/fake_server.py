@@ -0,0 +1,373 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+from ..prompts.prompts import FastApiPrompts
+
+API_PREFIX = "/api/v1"
+DEFAULT_FAKE_MODELS = ["fake/fast-coder", "fake/slow-coder"]
+DEFAULT_CHUNK_CHARS = 16
+SERVER_ERROR_CODES = (500, 502, 503)
+
+# Reply templates per prompt kind; $path, $name, $paths ("related") and $functions ("fix") are filled in from the prompt.
+# Code is returned without markdown fences, as the prompts ask. Override them with --responses.
+DEFAULT_RESPONSES = {
+    "scenarios": "testcase_$path:\n    - Send a valid request and expect a successful status code.\n    - Send an invalid body and expect 422 with a \"detail\" field.\n",
+    "related": "$paths",
+    "code": (
+        "import pytest\n\n"
+        "def test_${name}_responds():\n"
+        "    assert True\n\n"
+        "def test_${name}_rejects_invalid_body():\n"
+        "    assert True\n\n"
+        "if __name__ == \"__main__\":\n"
+        "    pytest.main([\"-vv\", \"-s\"])\n"
+    ),
+    "repair": "def ${name}():\n    assert True\n",
+    "fix": "import pytest\n\n$functions\nif __name__ == \"__main__\":\n    pytest.main([\"-vv\", \"-s\"])\n",
+}
+
+PATH_LINE = re.compile(r"^\s*Path: (\S+)", re.MULTILINE)
+ENDPOINT_LINE = re.compile(r"^Endpoint : (\S+)", re.MULTILINE)
+TEST_FUNCTION = re.compile(r"^\s*def (test\w*)\s*\(", re.MULTILINE)
+
+def prompt_marker(prompt: str) -> str:
+    """
+    First instruction line of a prompt, used to recognise which prompt a request carries.
+    """
+    return next(line.strip() for line in prompt.splitlines() if line.strip())
+
+PROMPT_KINDS = [
+    (prompt_marker(FastApiPrompts.pytest_test_scenarios_prompt), "scenarios"),
+    (prompt_marker(FastApiPrompts.semantic_endpoint_extraction_prompt), "related"),
+    (prompt_marker(FastApiPrompts.pytest_function_repair_prompt), "repair"),
+    (prompt_marker(FastApiPrompts.pytest_error_prompt), "fix"),
+    (prompt_marker(FastApiPrompts.finalize_test_file_prompt), "fix"),
+]
+
+class LatencyModel:
+    """
+    Response latency distribution parsed from "fixed:0.2", "uniform:0.1,0.5", "normal:0.3,0.1", "lognormal:-1.2,0.5"
+    or "exponential:0.3" (mean). A bare number is a fixed latency. All values are seconds.
+    """
+    DISTRIBUTIONS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, kind: str = "fixed", params: Tuple[float, ...] = (0.0,)):
+        self.kind = kind
+        self.params = params
+
+    @staticmethod
+    def parse(spec: str) -> "LatencyModel":
+        kind, _, raw_params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        kind = kind.strip().lower()
+        if kind not in LatencyModel.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{kind}' (choose from {', '.join(LatencyModel.DISTRIBUTIONS)})")
+        try:
+            params = tuple(float(value) for value in raw_params.split(","))
+        except ValueError:
+            raise ValueError(f"Latency parameters must be numbers: '{spec}'")
+        if len(params) != LatencyModel.DISTRIBUTIONS[kind]:
+            raise ValueError(f"'{kind}' latency takes {LatencyModel.DISTRIBUTIONS[kind]} parameter(s): '{spec}'")
+        return LatencyModel(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(*self.params)
+        elif self.kind == "exponential":
+            value = rng.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+        else:
+            value = self.params[0]
+        return max(0.0, value)
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{','.join(str(param) for param in self.params)}"
+
+class FakeOpenRouterServer:
+    """
+    Local stand-in for the OpenRouter /models and /chat/completions endpoints, for offline and reproducible load
+    tests. Replies are rendered from templates chosen by the prompt, with sampled latency, injected 429/5xx errors and
+    optional SSE streaming. GET /stats reports request counts, injected errors and the peak number of concurrent
+    completions, which shows whether the client kept to its concurrency limits.
+    """
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[LatencyModel] = None,
+        token_delay: float = 0.0,
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+        rate_429: float = 0.0,
+        rate_5xx: float = 0.0,
+        retry_after: float = 1.0,
+        responses: Optional[Dict[str, str]] = None,
+        models: Optional[List[str]] = None,
+        context_length: int = 128000,
+        seed: Optional[int] = 0,
+    ):
+        self.latency = latency or LatencyModel()
+        self.token_delay = token_delay
+        self.chunk_chars = max(1, chunk_chars)
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.responses = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.models = models or DEFAULT_FAKE_MODELS
+        self.context_length = context_length
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, Any] = {"requests": {}, "completions": 0, "streamed": 0, "injected": {}, "in_flight": 0, "max_in_flight": 0}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), FakeOpenRouterHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    @property
+    def stats_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/stats"
+
+    def start(self) -> "FakeOpenRouterServer":
+        """
+        Serves from a background thread; for tests and load scripts that run the client in the same process.
+        """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self.httpd.serve_forever()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def random(self) -> float:
+        with self._lock:
+            return self.rng.random()
+
+    def sample_latency(self) -> float:
+        with self._lock:
+            return self.latency.sample(self.rng)
+
+    def count(self, section: str, key: str) -> None:
+        with self._lock:
+            self.stats[section][key] = self.stats[section].get(key, 0) + 1
+
+    def enter_completion(self, streamed: bool) -> None:
+        with self._lock:
+            self.stats["completions"] += 1
+            self.stats["streamed"] += int(streamed)
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def leave_completion(self) -> None:
+        with self._lock:
+            self.stats["in_flight"] -= 1
+
+    def stats_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    def injected_error(self) -> Optional[int]:
+        """
+        Status code to fail the current completion with, or None.
+        """
+        roll = self.random()
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.rate_5xx:
+            return SERVER_ERROR_CODES[int(self.random() * len(SERVER_ERROR_CODES))]
+        return None
+
+    def models_payload(self) -> Dict[str, Any]:
+        return {
+            "data": [
+                {
+                    "id": model,
+                    "name": model,
+                    "context_length": self.context_length,
+                    "pricing": {"prompt": "0", "completion": "0"},
+                    "top_provider": {"context_length": self.context_length, "max_completion_tokens": self.context_length // 8},
+                }
+                for model in self.models
+            ]
+        }
+
+    @staticmethod
+    def prompt_kind(prompt: str) -> str:
+        for marker, kind in PROMPT_KINDS:
+            if marker in prompt:
+                return kind
+        return "code"
+
+    @staticmethod
+    def slug(path: str) -> str:
+        return re.sub(r"[^a-z0-9]+", "_", path.lower()).strip("_") or "root"
+
+    def completion_text(self, prompt: str) -> str:
+        kind = FakeOpenRouterServer.prompt_kind(prompt)
+        template = Template(self.responses[kind])
+        paths = PATH_LINE.findall(prompt)
+        if kind == "scenarios":
+            return "\n".join(template.safe_substitute(path=path, name=FakeOpenRouterServer.slug(path)) for path in paths or ["/"])
+        if kind == "related":
+            endpoint = (ENDPOINT_LINE.findall(prompt) or [""])[0]
+            related = [path for path in dict.fromkeys(paths) if path != endpoint]
+            return template.safe_substitute(path=endpoint, name=FakeOpenRouterServer.slug(endpoint), paths=json.dumps(related))
+        if kind in ("repair", "fix"):
+            # Passing stand-ins for the tests in the prompt, under the same names.
+            names = list(dict.fromkeys(TEST_FUNCTION.findall(prompt))) or ["test_repaired"]
+            functions = "\n".join(Template(self.responses["repair"]).safe_substitute(name=name) for name in names)
+            return functions if kind == "repair" else template.safe_substitute(functions=functions)
+        path = paths[0] if paths else "/"
+        return template.safe_substitute(path=path, name=FakeOpenRouterServer.slug(path))
+
+class FakeOpenRouterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeOpenRouter/1.0"
+
+    @property
+    def fake(self) -> FakeOpenRouterServer:
+        return self.server.fake
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def handle(self) -> None:
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # A client that ended a stream early closed or reset the kept-alive connection.
+            self.close_connection = True
+
+    def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_json(status, {"error": {"code": status, "message": message}}, headers)
+
+    def authorized(self) -> bool:
+        if self.headers.get("Authorization", "").startswith("Bearer "):
+            return True
+        self.send_error_json(401, "No auth credentials found")
+        return False
+
+    def do_GET(self) -> None:
+        route = self.path.split("?", 1)[0].rstrip("/")
+        self.fake.count("requests", f"GET {route}")
+        if route == f"{API_PREFIX}/models":
+            if not self.authorized():
+                return
+            payload = self.fake.models_payload()
+            etag = '"' + hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_json(200, payload, {"ETag": etag})
+        elif route == "/stats":
+            self.send_json(200, self.fake.stats_snapshot())
+        else:
+            self.send_error_json(404, f"Not found: {route}")
+
+    def do_POST(self) -> None:
+        route = self.path.split("?", 1)[0].rstrip("/")
+        self.fake.count("requests", f"POST {route}")
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except json.JSONDecodeError:
+            self.send_error_json(400, "Request body is not valid JSON")
+            return
+        if route != f"{API_PREFIX}/chat/completions":
+            self.send_error_json(404, f"Not found: {route}")
+            return
+        if not self.authorized():
+            return
+        if not body.get("model") or not isinstance(body.get("messages"), list):
+            self.send_error_json(400, "'model' and 'messages' are required")
+            return
+
+        streamed = bool(body.get("stream"))
+        self.fake.enter_completion(streamed)
+        try:
+            error = self.fake.injected_error()
+            if error == 429:
+                self.fake.count("injected", "429")
+                self.send_error_json(429, "Rate limit exceeded", {"Retry-After": f"{self.fake.retry_after:g}"})
+                return
+            time.sleep(self.fake.sample_latency())
+            if error is not None:
+                self.fake.count("injected", str(error))
+                self.send_error_json(error, "Injected upstream error")
+                return
+
+            prompt = "\n".join(str(message.get("content", "")) for message in body["messages"] if isinstance(message, dict))
+            content = self.fake.completion_text(prompt)
+            usage = {"prompt_tokens": max(1, len(prompt) // 4), "completion_tokens": max(1, len(content) // 4)}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            if streamed:
+                self.stream_completion(body["model"], content, usage)
+            else:
+                self.send_json(200, {
+                    "id": f"gen-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "model": body["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading (e.g. a stop detector ended the stream early).
+            self.close_connection = True
+        finally:
+            self.fake.leave_completion()
+
+    def write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def write_event(self, payload: Any) -> None:
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        self.write_chunk(f"data: {data}\n\n".encode("utf-8"))
+
+    def stream_completion(self, model: str, content: str, usage: Dict[str, int]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        generation_id = f"gen-{time.time_ns()}"
+        self.write_chunk(b": OPENROUTER PROCESSING\n\n")
+        for start in range(0, len(content), self.fake.chunk_chars):
+            if start and self.fake.token_delay:
+                time.sleep(self.fake.token_delay)
+            delta = content[start:start + self.fake.chunk_chars]
+            self.write_event({"id": generation_id, "model": model, "choices": [{"index": 0, "delta": {"role": "assistant", "content": delta}, "finish_reason": None}]})
+        self.write_event({"id": generation_id, "model": model, "choices": [{"index": 0, "delta": {"content": ""}, "finish_reason": "stop"}], "usage": usage})
+        self.write_event("[DONE]")
+        self.write_chunk(b"")
@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import httpx
+from typing import Optional
+from config.rich_console import rich_console
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+def base_url_cache_parts(base_url: str) -> tuple:
+    """
+    Cache subdirectory for an OpenRouter-compatible endpoint. The real API keeps the top level, so replies and model
+    lists of another endpoint (such as the local fake server) never leak into real runs.
+    """
+    base_url = base_url.rstrip("/")
+    if base_url == OPENROUTER_BASE_URL:
+        return ()
+    return ("endpoints", hashlib.sha256(base_url.encode("utf-8")).hexdigest()[:12])
+
+class OpenRouterHttpClient:
+    """
+    Shared HTTP client for all OpenRouter traffic. Keeps one keep-alive connection pool per process with explicit
+    connect/read timeouts and optional HTTP/2.
+    """
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 300.0,
+        http2: bool = False,
+        max_connections: int = 20,
+    ):
+        self.base_url = (base_url or OPENROUTER_BASE_URL).rstrip("/")
+        self.timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=connect_timeout, pool=None)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=60.0)
+        self.http2 = http2 and OpenRouterHttpClient.http2_available()
+        if http2 and not self.http2:
+            rich_console.warning_string("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1.")
+        self._client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def http2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits, http2=self.http2)
+        return self._client
+
+    def get(self, path: str, **kwargs) -> httpx.Response:
+        return self.client.get(path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> httpx.Response:
+        return self.client.post(path, **kwargs)
+
+    def stream_post(self, path: str, **kwargs) -> httpx.Response:
+        """
+        Sends a POST whose body is read lazily; the caller must close the returned response.
+        """
+        return self.client.send(self.client.build_request("POST", path, **kwargs), stream=True)
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+_shared_client: Optional[OpenRouterHttpClient] = None
+_shared_client_lock = threading.Lock()
+
+def configure_http_client(**kwargs) -> OpenRouterHttpClient:
+    """
+    Replaces the shared client with one built from the given OpenRouterHttpClient arguments.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+        _shared_client = OpenRouterHttpClient(**kwargs)
+        return _shared_client
+
+def get_http_client() -> OpenRouterHttpClient:
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = OpenRouterHttpClient()
+    return _shared_client
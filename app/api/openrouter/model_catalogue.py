@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import httpx
+from config.cache_paths import get_cache_dir
+from config.rich_console import rich_console
+from .http_client import base_url_cache_parts, get_http_client
+from .rate_limiter import get_request_scheduler
+
+DEFAULT_CATALOGUE_TTL_SECONDS = 24 * 60 * 60
+# Room left for the completion when the model doesn't say how long its completions can be.
+DEFAULT_COMPLETION_RESERVE = 0.25
+
+class ModelCatalogue:
+    """
+    On-disk cache of the OpenRouter model list, reduced to a compact index of context length and pricing per model.
+    Fresh entries are served from disk; stale ones are served immediately while a background thread revalidates
+    them with ETag / If-Modified-Since, so a 304 costs one tiny request and no download.
+    """
+    def __init__(self, cache_file: Optional[Path] = None, ttl_seconds: float = DEFAULT_CATALOGUE_TTL_SECONDS):
+        self.cache_file = Path(cache_file) if cache_file else get_cache_dir(*base_url_cache_parts(get_http_client().base_url), "models") / "catalogue.json"
+        self.ttl_seconds = ttl_seconds
+        self.fetched_at = 0.0
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._refreshing: Optional[threading.Thread] = None
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.fetched_at = float(data["fetched_at"])
+            self.etag = data.get("etag")
+            self.last_modified = data.get("last_modified")
+            self.models = data["models"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            self.models = {}
+
+    def save(self) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": self.fetched_at, "etag": self.etag, "last_modified": self.last_modified, "models": self.models}, f)
+        os.replace(tmp_path, self.cache_file)
+
+    @staticmethod
+    def compact_entry(model: Dict[str, Any]) -> Dict[str, Any]:
+        pricing = model.get("pricing") or {}
+        top_provider = model.get("top_provider") or {}
+        return {
+            "context_length": model.get("context_length") or top_provider.get("context_length"),
+            "max_completion_tokens": top_provider.get("max_completion_tokens"),
+            "prompt_price": pricing.get("prompt"),
+            "completion_price": pricing.get("completion"),
+        }
+
+    def is_fresh(self) -> bool:
+        return bool(self.models) and time.time() - self.fetched_at < self.ttl_seconds
+
+    def refresh(self, api_key: str, force: bool = False) -> bool:
+        """
+        Revalidates (or with `force`, re-downloads) the catalogue. Returns True if the model list changed.
+        """
+        headers = {"Authorization": f"Bearer {api_key}"}
+        if not force and self.models:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+        response = get_request_scheduler().execute(lambda: get_http_client().get("/models", headers=headers))
+        with self._lock:
+            if response.status_code == 304:
+                self.fetched_at = time.time()
+                self.save()
+                return False
+            response.raise_for_status()
+            models = {model["id"]: ModelCatalogue.compact_entry(model) for model in response.json().get("data", []) if "id" in model}
+            changed = models != self.models
+            self.models = models
+            self.etag = response.headers.get("ETag")
+            self.last_modified = response.headers.get("Last-Modified")
+            self.fetched_at = time.time()
+            self.save()
+            return changed
+
+    def refresh_in_background(self, api_key: str) -> None:
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return
+            self._refreshing = threading.Thread(target=self._background_refresh, args=(api_key,), daemon=True)
+            self._refreshing.start()
+
+    def _background_refresh(self, api_key: str) -> None:
+        try:
+            self.refresh(api_key)
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            rich_console.warning_string(f"⚠️ Background refresh of the model list failed, using the cached one: {e}")
+
+    def model_ids(self, api_key: str) -> List[str]:
+        """
+        Model ids for the picker: from disk when fresh, from disk plus a background revalidation when stale,
+        and from OpenRouter only when nothing is cached yet.
+        """
+        if not self.models:
+            self.refresh(api_key, force=True)
+        elif not self.is_fresh():
+            self.refresh_in_background(api_key)
+        return list(self.models)
+
+    def get(self, model_id: str) -> Dict[str, Any]:
+        return self.models.get(model_id) or {}
+
+    def prompt_budget(self, model_id: str, requested_tokens: int) -> int:
+        """
+        `requested_tokens` capped to what the model's context window leaves after room for the completion.
+        """
+        entry = self.get(model_id)
+        context_length = entry.get("context_length")
+        if not context_length:
+            return requested_tokens
+        reserve = entry.get("max_completion_tokens") or int(context_length * DEFAULT_COMPLETION_RESERVE)
+        return max(1024, min(requested_tokens, context_length - min(reserve, context_length // 2)))
+
+_shared_catalogue: Optional[ModelCatalogue] = None
+_shared_catalogue_lock = threading.Lock()
+
+def get_model_catalogue() -> ModelCatalogue:
+    global _shared_catalogue
+    if _shared_catalogue is None:
+        with _shared_catalogue_lock:
+            if _shared_catalogue is None:
+                _shared_catalogue = ModelCatalogue()
+    return _shared_catalogue
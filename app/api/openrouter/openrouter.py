@@ -1,10 +1,19 @@
 import sys
 from InquirerPy import inquirer
 from InquirerPy.base.control import Choice
-import requests
+import httpx
 import json
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional
 from ..prompts.prompts import FastApiPrompts
+from .http_client import get_http_client
+from .model_catalogue import get_model_catalogue
+from .rate_limiter import get_request_scheduler
+from .tokens import estimate_tokens
+from .response_cache import ResponseCache, get_response_cache
+from .streaming import StopDetector, consume_stream, get_completion_metrics, list_complete, streaming_enabled
+from api.parser.dependency_graph import EndpointDependencyGraph
+from api.parser.endpoint_renderer import EndpointRenderer
 from config.rich_console import rich_console
 
 class OpenRouter:
@@ -18,22 +27,13 @@ class OpenRouter:
             default=None,
         ).execute()
 
-    #todo - add retry annotation
-    def get_openrouter_models(api_key: str):
+    def get_openrouter_models(api_key: str, force_refresh: bool = False):
         try:
-            url = "https://openrouter.ai/api/v1/models"
-            headers = {
-                "Authorization": f"Bearer {api_key}"
-            }
-
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            models = data.get("data", [])
-            model_ids = [model["id"] for model in models if "id" in model]
-            return model_ids
-        except requests.RequestException as e:
+            catalogue = get_model_catalogue()
+            if force_refresh:
+                catalogue.refresh(api_key, force=True)
+            return catalogue.model_ids(api_key)
+        except httpx.HTTPError as e:
             rich_console.error_string(f"Failed to fetch models from OpenRouter: {e}")
             rich_console.error_string("Please check your openrouter connection.")
             sys.exit(1)
@@ -46,30 +46,114 @@ class OpenRouter:
             rich_console.error_string("Please check your openrouter connection.")
             sys.exit(1)
 
-    #todo - add retry annotation
-    def send_request_to_openrouter(api_key: str, model_name: str, prompt: str):
-        try:
-            response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers={
-            "Authorization": f"Bearer {api_key}",
-            },
-            data=json.dumps({
-                "model": model_name,
-                "messages": [
+    def build_chat_request(model_name: str, prompt: str) -> dict:
+        return {
+            "model": model_name,
+            "messages": [
                 {
                     "role": "user",
                     "content": prompt,
                 }
-                ]
-            })
+            ]
+        }
+
+    def estimate_request_tokens(request_body: dict) -> int:
+        return sum(estimate_tokens(message["content"]) for message in request_body["messages"])
+
+    def send_request_to_openrouter(api_key: str, model_name: str, prompt: str, stop_when: Optional[StopDetector] = None):
+        """
+        Returns the completion for the prompt. With streaming enabled, `stop_when` ends the stream as soon as the
+        expected answer (e.g. a code block) is complete.
+        """
+        request_body = OpenRouter.build_chat_request(model_name=model_name, prompt=prompt)
+        return get_response_cache().get_or_compute(
+            OpenRouter.cache_key(request_body, stop_when),
+            lambda: OpenRouter.request_chat_completion(api_key=api_key, request_body=request_body, stop_when=stop_when),
+        )
+
+    def cache_key(request_body: dict, stop_when: Optional[StopDetector] = None) -> str:
+        """
+        Streamed replies cut by a stop detector are cached apart from full replies, so a later run without
+        streaming (or with another detector) never gets the truncated text.
+        """
+        if streaming_enabled() and stop_when is not None:
+            return ResponseCache.make_key({**request_body, "stream": True, "stop_when": getattr(stop_when, "__name__", repr(stop_when))})
+        return ResponseCache.make_key(request_body)
+
+    def post_chat_completion(api_key: str, request_body: dict) -> str:
+        estimated_tokens = OpenRouter.estimate_request_tokens(request_body)
+        started_at = time.monotonic()
+        response = get_request_scheduler().execute(
+            lambda: get_http_client().post(
+                "/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                },
+                json=request_body,
+            ),
+            estimated_tokens=estimated_tokens,
+        )
+        response.raise_for_status()
+        data = response.json()
+        get_completion_metrics().record(
+            model=request_body["model"],
+            duration=time.monotonic() - started_at,
+            time_to_first_token=None,
+            total_tokens=(data.get("usage") or {}).get("total_tokens"),
+            streamed=False,
+        )
+        return data['choices'][0]['message']['content']
+
+    def stream_chat_completion(api_key: str, request_body: dict, stop_when: Optional[StopDetector] = None) -> str:
+        estimated_tokens = OpenRouter.estimate_request_tokens(request_body)
+        started_at = time.monotonic()
+        response = get_request_scheduler().execute(
+            lambda: get_http_client().stream_post(
+                "/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                },
+                json={**request_body, "stream": True, "usage": {"include": True}},
+            ),
+            estimated_tokens=estimated_tokens,
+        )
+        try:
+            if response.is_error:
+                response.read()
+                response.raise_for_status()
+            content, time_to_first_token, total_tokens, stopped_early = consume_stream(
+                response.iter_lines(),
+                stop_when=stop_when,
+                started_at=started_at,
+                clock=time.monotonic,
             )
-            return response.json()['choices'][0]['message']['content']
+        finally:
+            response.close()
+        if total_tokens is None:
+            # No usage frame (the stream was stopped early): estimate prompt plus the completion read so far.
+            total_tokens = estimated_tokens + estimate_tokens(content)
+        get_request_scheduler().record_tokens(total_tokens, estimated_tokens)
+        get_completion_metrics().record(
+            model=request_body["model"],
+            duration=time.monotonic() - started_at,
+            time_to_first_token=time_to_first_token,
+            total_tokens=total_tokens,
+            streamed=True,
+            stopped_early=stopped_early,
+        )
+        return content
+
+    def request_chat_completion(api_key: str, request_body: dict, stop_when: Optional[StopDetector] = None):
+        try:
+            with get_request_scheduler().slot():
+                if streaming_enabled():
+                    return OpenRouter.stream_chat_completion(api_key=api_key, request_body=request_body, stop_when=stop_when)
+                return OpenRouter.post_chat_completion(api_key=api_key, request_body=request_body)
         except json.JSONDecodeError as e:
             rich_console.error_string(f"Failed to parse response from OpenRouter: {e}")
             rich_console.error_string("Please check your openrouter connection.")
             sys.exit(1)
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             rich_console.error_string(f"Request to OpenRouter failed: {e}")
             rich_console.error_string("Please check your openrouter connection.")
             sys.exit(1)
@@ -77,7 +161,6 @@ class OpenRouter:
             rich_console.error_string(f"An unexpected error occurred: {e}")
             rich_console.error_string("Please check your openrouter connection.")
             sys.exit(1)
-            
 
     def convert_scenarios_dict_to_list(scenarios_dict: Dict[str, Dict[str, str]]):
         formatted_scenarios = []
@@ -134,6 +217,19 @@ class OpenRouter:
         ).execute()
         return None if selected == "[None]" else selected
 
-    def get_relative_endpoints(endpoint_path:str, openapi_data: dict, api_key: str, open_router_model: str) -> List[str]:
-        prompt = FastApiPrompts.semantic_endpoint_extraction_prompt + "\n\n" + "Endpoint : " + endpoint_path + "\n\n" + "OpenAPI Data: " + str(openapi_data)
-        return OpenRouter.send_request_to_openrouter(api_key=api_key, model_name=open_router_model, prompt=prompt)
\ No newline at end of file
+    def get_relative_endpoints(endpoint_path:str, openapi_data: dict, api_key: str, open_router_model: str, refine_with_llm: bool = False) -> str:
+        """
+        Related endpoints of a path as a JSON list string. They come from the local dependency graph. With
+        refine_with_llm the model picks from the graph's wider neighbourhood instead of reading the whole spec.
+        """
+        graph = EndpointDependencyGraph.for_spec(openapi_data)
+        if not refine_with_llm:
+            return json.dumps(graph.related(endpoint_path))
+
+        neighbourhood = graph.related(endpoint_path, limit=25, min_score=1.0)
+        if not neighbourhood:
+            return json.dumps([])
+        renderer = EndpointRenderer.for_spec(openapi_data)
+        pruned_openapi_data = "".join(renderer.render(path) for path in [endpoint_path] + neighbourhood)
+        prompt = FastApiPrompts.semantic_endpoint_extraction_prompt + "\n\n" + "Endpoint : " + endpoint_path + "\n\n" + "OpenAPI Data: " + pruned_openapi_data
+        return OpenRouter.send_request_to_openrouter(api_key=api_key, model_name=open_router_model, prompt=prompt, stop_when=list_complete)
\ No newline at end of file
@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+import httpx
+from config.rich_console import rich_console
+
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`. Callers block in acquire() until enough
+    tokens are available. Requests larger than the capacity are allowed once the bucket is full.
+    """
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes `amount` tokens and returns how long the caller has to wait before using them.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+    def acquire(self, amount: float = 1.0) -> None:
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    def debit(self, amount: float) -> None:
+        """
+        Charges tokens after the fact (e.g. the real usage reported by the provider), possibly going negative.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+class RequestScheduler:
+    """
+    Sends OpenRouter requests with exponential backoff, full jitter and Retry-After support. Client-side request
+    and token buckets are shared by every caller, and a 429 pauses all callers until the provider's retry time.
+    """
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self.retries = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def slot(self):
+        """
+        Held for the whole of a completion (including reading its stream), so at most `max_in_flight`
+        completions are running across every caller in the process.
+        """
+        return self.in_flight if self.in_flight is not None else nullcontext()
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+
+    def retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        provider_delay = RequestScheduler.parse_retry_after(retry_after)
+        if provider_delay is not None:
+            return min(provider_delay, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def admission_delay(self, estimated_tokens: int) -> float:
+        delay = 0.0
+        if self.request_bucket:
+            delay = max(delay, self.request_bucket.reserve(1))
+        if self.token_bucket:
+            delay = max(delay, self.token_bucket.reserve(estimated_tokens))
+        with self._lock:
+            delay = max(delay, self._paused_until - time.monotonic())
+        return delay
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def record_usage(self, response: httpx.Response, estimated_tokens: int) -> None:
+        if not self.token_bucket or not response.is_stream_consumed:
+            return
+        try:
+            total_tokens = (response.json().get("usage") or {}).get("total_tokens")
+        except Exception:
+            return
+        self.record_tokens(total_tokens, estimated_tokens)
+
+    def record_tokens(self, total_tokens: Optional[int], estimated_tokens: int) -> None:
+        if self.token_bucket and total_tokens and total_tokens > estimated_tokens:
+            self.token_bucket.debit(total_tokens - estimated_tokens)
+
+    def should_retry(self, attempt: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """
+        Returns the delay before the next attempt, or None when the response (or error) must be returned as is.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if response is not None and response.status_code not in RETRYABLE_STATUS_CODES and response.status_code < 500:
+            return None
+        delay = self.retry_delay(attempt, response.headers.get("Retry-After") if response is not None else None)
+        if response is not None and response.status_code == 429:
+            self.pause(delay)
+        with self._lock:
+            self.retries += 1
+        reason = f"HTTP {response.status_code}" if response is not None else "connection error"
+        rich_console.warning_string(f"OpenRouter {reason}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def execute(self, send: Callable[[], httpx.Response], estimated_tokens: int = 1) -> httpx.Response:
+        attempt = 0
+        while True:
+            wait = self.admission_delay(estimated_tokens)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = send()
+            except httpx.TransportError:
+                delay = self.should_retry(attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            delay = self.should_retry(attempt, response)
+            if delay is None:
+                self.record_usage(response, estimated_tokens)
+                return response
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+_shared_scheduler: Optional[RequestScheduler] = None
+_shared_scheduler_lock = threading.Lock()
+
+def configure_request_scheduler(**kwargs) -> RequestScheduler:
+    """
+    Replaces the shared scheduler with one built from the given RequestScheduler arguments.
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        _shared_scheduler = RequestScheduler(**kwargs)
+        return _shared_scheduler
+
+def get_request_scheduler() -> RequestScheduler:
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        with _shared_scheduler_lock:
+            if _shared_scheduler is None:
+                _shared_scheduler = RequestScheduler()
+    return _shared_scheduler
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from config.cache_paths import get_cache_dir
+from .http_client import base_url_cache_parts, get_http_client
+
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for LLM completions. Entries are keyed by a hash of the full request body
+    (model, messages and generation params) and evicted least-recently-used first once the size cap is exceeded.
+    Identical requests that are in flight at the same time are coalesced into one call.
+    """
+    def __init__(self, cache_dir: Optional[Path] = None, max_size_bytes: int = DEFAULT_CACHE_MAX_BYTES, enabled: bool = True, refresh: bool = False):
+        self.cache_dir = Path(cache_dir) if cache_dir else get_cache_dir(*base_url_cache_parts(get_http_client().base_url), "responses")
+        self.max_size_bytes = max_size_bytes
+        self.enabled = enabled
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._size_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(request_body: dict) -> str:
+        return hashlib.sha256(json.dumps(request_body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = json.load(f)["content"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            return None
+        try:
+            # The mtime is the LRU clock: touch the entry on every hit.
+            os.utime(path)
+        except OSError:
+            pass
+        return content
+
+    def put(self, key: str, content: str) -> None:
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"content": content}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._size_bytes is None:
+                self._size_bytes = self.scan_size()
+            else:
+                self._size_bytes += path.stat().st_size
+            over_limit = self._size_bytes > self.max_size_bytes
+        if over_limit:
+            self.evict()
+
+    def scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self.cache_dir.glob("*/*.json"))
+
+    def evict(self) -> None:
+        with self._lock:
+            entries = []
+            for entry in self.cache_dir.glob("*/*.json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            # Evict down to 90% of the cap so that every following put doesn't trigger another scan.
+            target = int(self.max_size_bytes * 0.9)
+            for _, size, entry in entries:
+                if total <= target:
+                    break
+                try:
+                    entry.unlink()
+                    total -= size
+                except FileNotFoundError:
+                    pass
+            self._size_bytes = total
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        if not self.enabled:
+            return compute()
+
+        if not self.refresh:
+            cached = self.get(key)
+            if cached is not None:
+                self.record_hit()
+                return cached
+
+        with self._lock:
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = Future()
+                self._in_flight[key] = pending
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+        if not owner:
+            return pending.result()
+
+        try:
+            content = None if self.refresh else self.get(key)
+            if content is not None:
+                # Another caller finished the same request between our lookup and registering as owner.
+                self.record_hit()
+                pending.set_result(content)
+                return content
+            content = compute()
+            if isinstance(content, str):
+                self.put(key, content)
+            self.record_miss()
+            pending.set_result(content)
+            return content
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats_string(self) -> str:
+        return f"🗄️ LLM response cache: {self.hits} hits, {self.misses} misses, {self.coalesced} coalesced"
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+def configure_response_cache(**kwargs) -> ResponseCache:
+    """
+    Replaces the shared cache with one built from the given ResponseCache arguments.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        _shared_cache = ResponseCache(**kwargs)
+        return _shared_cache
+
+def get_response_cache() -> ResponseCache:
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = ResponseCache()
+    return _shared_cache
@@ -0,0 +1,157 @@
+import json
+import re
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+# A stop detector gets the text streamed so far and returns the index where the answer is complete, or None.
+StopDetector = Callable[[str], Optional[int]]
+
+_OPENING_FENCE = re.compile(r"^```[ \t]*(python|py)?[ \t]*$", re.MULTILINE | re.IGNORECASE)
+_CLOSING_FENCE = re.compile(r"^```[ \t]*$", re.MULTILINE)
+
+def code_block_complete(text: str) -> Optional[int]:
+    """
+    Stops once the first fenced code block is closed, so trailing explanations are not waited for.
+    """
+    opening = _OPENING_FENCE.search(text)
+    if not opening:
+        return None
+    closing = _CLOSING_FENCE.search(text, opening.end() + 1)
+    return closing.end() if closing else None
+
+def scenario_list_complete(text: str) -> Optional[int]:
+    """
+    Scenario answers have no end marker of their own; stop only when a model wrapped them in a fence and closed it.
+    """
+    stripped = text.lstrip()
+    if not stripped.startswith("```"):
+        return None
+    offset = len(text) - len(stripped)
+    first_line_end = stripped.find("\n")
+    if first_line_end == -1:
+        return None
+    closing = _CLOSING_FENCE.search(stripped, first_line_end + 1)
+    return offset + closing.end() if closing else None
+
+def list_complete(text: str) -> Optional[int]:
+    """
+    Stops once a bracketed list (e.g. the related endpoints answer) is balanced.
+    """
+    start = text.find("[")
+    if start == -1:
+        return None
+    depth = 0
+    quote = None
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return None
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Yields the JSON payloads of an OpenAI-compatible SSE stream, skipping keep-alive comments.
+    """
+    for line in lines:
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            continue
+
+class CompletionMetrics:
+    """
+    Per-call latency and token usage of OpenRouter completions, collected for the end-of-run summary.
+    """
+    def __init__(self):
+        self.calls: List[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, model: str, duration: float, time_to_first_token: Optional[float], total_tokens: Optional[int], streamed: bool, stopped_early: bool = False) -> None:
+        with self._lock:
+            self.calls.append({
+                "model": model,
+                "duration": duration,
+                "time_to_first_token": time_to_first_token,
+                "total_tokens": total_tokens,
+                "streamed": streamed,
+                "stopped_early": stopped_early,
+            })
+
+    def summary_string(self) -> str:
+        with self._lock:
+            calls = list(self.calls)
+        if not calls:
+            return "📈 No OpenRouter completions were requested."
+        ttfts = [call["time_to_first_token"] for call in calls if call["time_to_first_token"] is not None]
+        tokens = sum(call["total_tokens"] or 0 for call in calls)
+        average_duration = sum(call["duration"] for call in calls) / len(calls)
+        summary = f"📈 OpenRouter: {len(calls)} calls, {tokens} tokens, avg {average_duration:.1f}s per call"
+        if ttfts:
+            summary += f", avg time to first token {sum(ttfts) / len(ttfts):.2f}s"
+        early = sum(1 for call in calls if call["stopped_early"])
+        if early:
+            summary += f", {early} streams stopped early"
+        return summary
+
+_streaming_enabled = False
+_completion_metrics = CompletionMetrics()
+
+def configure_streaming(enabled: bool) -> None:
+    global _streaming_enabled
+    _streaming_enabled = enabled
+
+def streaming_enabled() -> bool:
+    return _streaming_enabled
+
+def get_completion_metrics() -> CompletionMetrics:
+    return _completion_metrics
+
+def consume_stream(lines: Iterable[str], stop_when: Optional[StopDetector] = None, started_at: float = 0.0, clock: Callable[[], float] = None) -> Tuple[str, Optional[float], Optional[int], bool]:
+    """
+    Accumulates streamed content and returns (content, time_to_first_token, total_tokens, stopped_early).
+    total_tokens is None when the stream carried no usage frame (e.g. it was stopped before the last chunk).
+    """
+    parts: List[str] = []
+    time_to_first_token = None
+    total_tokens = None
+    for event in iter_sse_events(lines):
+        may_be_complete = False
+        if "error" in event:
+            raise ValueError(f"OpenRouter stream error: {event['error']}")
+        usage = event.get("usage")
+        if usage and usage.get("total_tokens"):
+            total_tokens = usage["total_tokens"]
+        for choice in event.get("choices", []):
+            delta = choice.get("delta", {}).get("content")
+            if not delta:
+                continue
+            if time_to_first_token is None and clock:
+                time_to_first_token = clock() - started_at
+            parts.append(delta)
+            # Every detector ends on a closing fence or bracket; skip the join for chunks that can't complete it.
+            may_be_complete = may_be_complete or "`" in delta or "]" in delta
+        if stop_when and may_be_complete:
+            text = "".join(parts)
+            cut = stop_when(text)
+            if cut is not None:
+                return text[:cut], time_to_first_token, total_tokens, True
+    return "".join(parts), time_to_first_token, total_tokens, False
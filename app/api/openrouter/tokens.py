@@ -0,0 +1,5 @@
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for budgeting (~4 characters per token); good enough for rate limiting and prompt sizing.
+    """
+    return max(1, len(text) // 4)
@@ -0,0 +1,135 @@
+import math
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Set
+from api.parser.endpoint_renderer import HTTP_METHODS, EndpointRenderer
+from api.parser.schema_index import SchemaIndex
+from api.parser.spec_cache import SpecCache
+
+_PATH_PARAM = re.compile(r"^\{(.+)\}$")
+
+class EndpointDependencyGraph:
+    """
+    Local, deterministic replacement for asking the LLM which endpoints are related. Paths are linked by shared
+    static prefixes, path parameters, request/response schemas and security schemes. Features shared by most of
+    the spec (e.g. HTTPValidationError) are down-weighted by inverse document frequency.
+    """
+    PREFIX_WEIGHT = 3.0
+    PARAM_WEIGHT = 2.0
+    SCHEMA_WEIGHT = 2.0
+    NESTED_SCHEMA_WEIGHT = 1.0
+    SECURITY_WEIGHT = 0.5
+
+    _graphs = SpecCache()
+
+    def __init__(self, openapi_data: dict):
+        self.paths: List[str] = list((openapi_data.get("paths") or {}).keys())
+        self.schema_index = SchemaIndex.for_spec(openapi_data)
+        self.features: Dict[str, Dict[str, Any]] = {}
+        self.by_root: Dict[str, Set[str]] = defaultdict(set)
+        self.by_param: Dict[str, Set[str]] = defaultdict(set)
+        self.by_schema: Dict[str, Set[str]] = defaultdict(set)
+        for path in self.paths:
+            features = self.extract_features(path, openapi_data["paths"][path])
+            self.features[path] = features
+            if features["segments"]:
+                self.by_root[features["segments"][0]].add(path)
+            for param in features["params"]:
+                self.by_param[param].add(path)
+            for schema in features["schemas"] | features["nested_schemas"]:
+                self.by_schema[schema].add(path)
+        self._related: Dict[str, List[str]] = {}
+
+    @staticmethod
+    def for_spec(openapi_data: dict) -> "EndpointDependencyGraph":
+        return EndpointDependencyGraph._graphs.get(openapi_data, EndpointDependencyGraph)
+
+    @staticmethod
+    def clear_cache() -> None:
+        EndpointDependencyGraph._graphs.clear()
+
+    def extract_features(self, path: str, path_item: Dict[str, Any]) -> Dict[str, Any]:
+        segments, params = [], set()
+        for segment in path.strip("/").split("/"):
+            if not segment:
+                continue
+            match = _PATH_PARAM.match(segment)
+            if match:
+                params.add(match.group(1))
+            else:
+                segments.append(segment.lower())
+        schemas, nested_schemas, security = set(), set(), set()
+        for method, method_data in path_item.items():
+            if method.lower() not in HTTP_METHODS or not isinstance(method_data, dict):
+                continue
+            refs = []
+            if "requestBody" in method_data:
+                refs.append(EndpointRenderer.json_schema_ref(method_data["requestBody"]))
+            for status_code, response in method_data.get("responses", {}).items():
+                if str(status_code).startswith("2"):
+                    refs.append(EndpointRenderer.json_schema_ref(response))
+            for ref in refs:
+                if ref:
+                    schema_name = SchemaIndex.ref_name(ref)
+                    schemas.add(schema_name)
+                    nested_schemas.update(self.schema_index.referenced_schemas(schema_name))
+            for security_req in method_data.get("security", []):
+                security.update(security_req.keys())
+        return {"segments": segments, "params": params, "schemas": schemas, "nested_schemas": nested_schemas - schemas, "security": security}
+
+    def idf(self, index: Dict[str, Set[str]], key: str) -> float:
+        frequency = len(index.get(key, ()))
+        if not frequency or frequency > len(self.paths) / 2:
+            return 0.0
+        return math.log(len(self.paths) / frequency) + 1.0
+
+    def score(self, path: str, other: str) -> float:
+        a, b = self.features[path], self.features[other]
+        shared_prefix = 0
+        for left, right in zip(a["segments"], b["segments"]):
+            if left != right:
+                break
+            shared_prefix += 1
+        score = shared_prefix * self.PREFIX_WEIGHT
+        if shared_prefix and shared_prefix == min(len(a["segments"]), len(b["segments"])):
+            # One path is the collection or parent resource of the other (e.g. /items and /items/{id}).
+            score += self.PREFIX_WEIGHT
+        score += sum(self.PARAM_WEIGHT * self.idf(self.by_param, param) for param in a["params"] & b["params"])
+        a_schemas, b_schemas = a["schemas"] | a["nested_schemas"], b["schemas"] | b["nested_schemas"]
+        for schema in a_schemas & b_schemas:
+            direct = schema in a["schemas"] and schema in b["schemas"]
+            score += (self.SCHEMA_WEIGHT if direct else self.NESTED_SCHEMA_WEIGHT) * self.idf(self.by_schema, schema)
+        if a["security"] & b["security"]:
+            score += self.SECURITY_WEIGHT
+        return score
+
+    def candidates(self, path: str) -> Set[str]:
+        features = self.features[path]
+        found: Set[str] = set()
+        if features["segments"]:
+            found |= self.by_root[features["segments"][0]]
+        for param in features["params"]:
+            if self.idf(self.by_param, param):
+                found |= self.by_param[param]
+        for schema in features["schemas"] | features["nested_schemas"]:
+            if self.idf(self.by_schema, schema):
+                found |= self.by_schema[schema]
+        found.discard(path)
+        return found
+
+    def related(self, path: str, limit: int = 10, min_score: float = 2.0) -> List[str]:
+        """
+        Related paths ordered by descending score (ties in spec order).
+        """
+        if path not in self.features:
+            return []
+        cache_key = f"{limit}:{min_score}:{path}"
+        cached = self._related.get(cache_key)
+        if cached is not None:
+            return cached
+        order = {candidate: position for position, candidate in enumerate(self.paths)}
+        scored = [(self.score(path, candidate), candidate) for candidate in self.candidates(path)]
+        ranked = sorted((item for item in scored if item[0] >= min_score), key=lambda item: (-item[0], order[item[1]]))
+        related = [candidate for _, candidate in ranked[:limit]]
+        self._related[cache_key] = related
+        return related
@@ -0,0 +1,90 @@
+from typing import Any, Dict, List, Optional
+from api.parser.schema_index import SCHEMA_REF_PREFIX, SchemaIndex
+from api.parser.spec_cache import SpecCache
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+class EndpointRenderer:
+    """
+    Renders the prompt description of each path once per spec and caches it. The scenario prompts and the
+    related-endpoints context read the same text, so rendering stays linear in the size of the spec.
+    """
+    _renderers = SpecCache()
+
+    def __init__(self, openapi_data: dict):
+        self.openapi_data = openapi_data
+        self.paths: Dict[str, Any] = openapi_data.get("paths", {}) or {}
+        self.schema_index = SchemaIndex.for_spec(openapi_data)
+        self._rendered: Dict[str, str] = {}
+
+    @staticmethod
+    def for_spec(openapi_data: dict) -> "EndpointRenderer":
+        return EndpointRenderer._renderers.get(openapi_data, EndpointRenderer)
+
+    @staticmethod
+    def clear_cache() -> None:
+        EndpointRenderer._renderers.clear()
+
+    @staticmethod
+    def json_schema_ref(container: Dict[str, Any]) -> Optional[str]:
+        return container.get("content", {}).get("application/json", {}).get("schema", {}).get("$ref")
+
+    def render(self, path: str) -> Optional[str]:
+        """
+        Returns the description of the path, or None if the spec doesn't define it.
+        """
+        rendered = self._rendered.get(path)
+        if rendered is not None:
+            return rendered
+        path_item = self.paths.get(path)
+        if path_item is None:
+            return None
+        rendered = "".join(self.render_parts(path, path_item))
+        self._rendered[path] = rendered
+        return rendered
+
+    def render_parts(self, path: str, path_item: Dict[str, Any]) -> List[str]:
+        parts = [f"Path: {path}\n"]
+        shared_parameters = path_item.get("parameters", [])
+
+        for method, method_data in path_item.items():
+            if method.lower() not in HTTP_METHODS or not isinstance(method_data, dict):
+                continue
+            parts.append(f"  Method: {method.upper()}\n")
+            parts.append(f"    Summary: {method_data.get('summary', 'No summary available')}")
+            parts.append(f"\n    Operation ID: {method_data.get('operationId', 'No operation ID available')}\n")
+
+            if 'requestBody' in method_data:
+                request_schema_ref = EndpointRenderer.json_schema_ref(method_data["requestBody"])
+                parts.append(f"    Request Body Schema Ref: {request_schema_ref}\n")
+                if request_schema_ref and request_schema_ref.startswith(SCHEMA_REF_PREFIX):
+                    parts.append("    Request Body Schema:\n")
+                    parts.append(self.schema_index.render_schema(SchemaIndex.ref_name(request_schema_ref)))
+
+            if 'security' in method_data:
+                parts.append("    Security Requirements:\n")
+                for security_req in method_data['security']:
+                    for scheme_name, scopes in security_req.items():
+                        parts.append(f"      - Scheme: {scheme_name}, Scopes: {', '.join(scopes) if scopes else 'None'}\n")
+
+            parts.append("    Responses:\n")
+            for status_code, response in method_data.get("responses", {}).items():
+                parts.append(f"      {status_code}: {response.get('description', '')}\n")
+                ref = EndpointRenderer.json_schema_ref(response)
+                if ref:
+                    parts.append(f"        Response Schema Ref: {ref}\n")
+                    parts.append("        Response Schema:\n")
+                    parts.append(self.schema_index.render_schema(SchemaIndex.ref_name(ref)))
+
+            parameters = shared_parameters + method_data.get("parameters", [])
+            if parameters:
+                parts.append("    Parameters:\n")
+                for param in parameters:
+                    if "$ref" in param:
+                        parts.append(f"      - Ref: {param['$ref']}\n")
+                        continue
+                    param_type = SchemaIndex.describe_type(param.get("schema", {}), default="Unknown type")
+                    parts.append(f"      - Name: {param.get('name')}, In: {param.get('in')}, Type: {param_type}\n")
+
+            parts.append("\n")
+        return parts
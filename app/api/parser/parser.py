@@ -1,168 +1,150 @@
 import re
 import ast
 from api.openrouter.openrouter import OpenRouter
+from api.openrouter.tokens import estimate_tokens
+from api.openrouter.streaming import scenario_list_complete
 from api.prompts.prompts import FastApiPrompts
+from api.parser.endpoint_renderer import EndpointRenderer
+from api.parser.schema_index import SCHEMA_REF_PREFIX, SchemaIndex
 import json
 from tqdm import tqdm
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List
 
 class ParserFunctions:
 
     def request_body_schema_parser(openapi_data: dict, schema_ref: str) -> str:
-        output = ""
-        if not schema_ref or not schema_ref.startswith("#/components/schemas/"):
-            return output
-        
-        schema_name = schema_ref.split("/")[-1]
-        schema = openapi_data.get("components", {}).get("schemas", {}).get(schema_name, {})
-        
-        if "properties" not in schema:
-            return f"     Unable to parse schema: {schema_name}\n"
-
-        for prop_name, prop_info in schema["properties"].items():
-            prop_type = prop_info.get("type", "Unknown")
-            prop_title = prop_info.get("title", "")
-            output += f"     Schema Item: {prop_name}\n"
-            output += f"         Type: {prop_type}\n"
-            if prop_title:
-                output += f"         Title: {prop_title}\n"
-        return output
+        if not schema_ref or not schema_ref.startswith(SCHEMA_REF_PREFIX):
+            return ""
+        return SchemaIndex.for_spec(openapi_data).render_schema(SchemaIndex.ref_name(schema_ref))
 
     def parse_single_endpoint(openapi_data: dict,endpoint_name: str,) -> str:
-        parsed_open_api_data = {}
-
-        if "paths" not in openapi_data or endpoint_name not in openapi_data["paths"]:
-            return json.dumps(parsed_open_api_data, indent=2)
-
-        path = endpoint_name
-        methods = openapi_data["paths"][path]
-        parsed_open_api_string = f"Path: {path}\n"
-
-        for method, method_data in methods.items():
-            parsed_open_api_string += f"  Method: {method.upper()}\n"
-            parsed_open_api_string += f"    Summary: {method_data.get('summary', 'No summary available')}"
-            parsed_open_api_string += f"\n    Operation ID: {method_data.get('operationId', 'No operation ID available')}\n"
-            
-            if 'requestBody' in method_data:
-                request_schema_ref = (
-                    method_data["requestBody"]
-                    .get("content", {})
-                    .get("application/json", {})
-                    .get("schema", {})
-                    .get("$ref")
-                )
-                # parsed_open_api_string += f"    Request Body Schema: {request_schema_ref}\n"
-                parsed_open_api_string += f"    Request Body Schema Ref:\n {ParserFunctions.request_body_schema_parser(openapi_data, request_schema_ref)}\n"
-                parsed_open_api_string += f"    Request Body Schema:\n {ParserFunctions.request_body_schema_parser(openapi_data=openapi_data, schema_ref=request_schema_ref)}"
-                # parsed_open_api_string += f"    Request Body Schema: {get_response_schema(openapi_data=openapi_data, schema_name=request_schema_ref.split("/")[-1])}\n"
-            
-            if 'security' in method_data:
-                parsed_open_api_string += "    Security Requirements:\n"
-                for security_req in method_data['security']:
-                    for scheme_name, scopes in security_req.items():
-                        parsed_open_api_string += f"      - Scheme: {scheme_name}, Scopes: {', '.join(scopes) if scopes else 'None'}\n"
-            
-            parsed_open_api_string += "    Responses:\n"
-            for status_code, response in method_data.get("responses", {}).items():
-                parsed_open_api_string += f"      {status_code}: {response.get('description', '')}\n"
-                
-                content = response.get("content", {})
-                json_content = content.get("application/json", {})
-                schema = json_content.get("schema", {})
-                ref = schema.get("$ref")
-                
-                if ref:
-                    parsed_open_api_string += f"        Response Schema Ref: {ref}\n"
-                    parsed_open_api_string += f"        Response Schema:\n"
-                    parsed_open_api_string += ParserFunctions.get_response_schema(openapi_data=openapi_data, schema_name=ref.split("/")[-1])
-            
-            if 'parameters' in method_data:
-                parsed_open_api_string += "    Parameters:\n"
-                for param in method_data["parameters"]:
-                    param_schema = param.get("schema", {})
-                    param_type = param_schema.get("type", "Unknown type")
-                    parsed_open_api_string += f"      - Name: {param['name']}, In: {param['in']}, Type: {param_type}\n"
-            
-            parsed_open_api_string += "\n"
+        parsed_open_api_string = EndpointRenderer.for_spec(openapi_data).render(endpoint_name)
+        if parsed_open_api_string is None:
+            return json.dumps({}, indent=2)
         return parsed_open_api_string
 
-    def parse_open_api(openapi_data: dict, api_key: Optional[str] = None, open_router_models: Optional[str] = None) -> None:
-        #todo - add api_key and open router model check method here
-        parsed_open_api_data = {}
-
-        for path in tqdm(openapi_data["paths"], desc="👷 Generating Test Scenarios", unit="endpoint"):
-            methods = openapi_data["paths"][path]
-            parsed_open_api_string = f"Path: {path}\n"
-
-            for method, method_data in methods.items():
-                parsed_open_api_string += f"  Method: {method.upper()}\n"
-                parsed_open_api_string += f"    Summary: {method_data.get('summary', 'No summary available')}"
-                parsed_open_api_string += f"\n    Operation ID: {method_data.get('operationId', 'No operation ID available')}\n"
-                if 'requestBody' in method_data:
-                    request_schema_ref = (
-                        method_data["requestBody"]
-                        .get("content", {})
-                        .get("application/json", {})
-                        .get("schema", {})
-                        .get("$ref")
-                    )
-                    parsed_open_api_string += f"    Request Body Schema: {request_schema_ref}\n"
-                if 'security' in method_data:
-                    parsed_open_api_string += "    Security Requirements:\n"
-                    for security_req in method_data['security']:
-                        for scheme_name, scopes in security_req.items():
-                            parsed_open_api_string += f"      - Scheme: {scheme_name}, Scopes: {', '.join(scopes) if scopes else 'None'}\n"
-
-                parsed_open_api_string += "    Responses:\n"
-                for status_code, response in method_data.get("responses", {}).items():
-                    parsed_open_api_string += f"      {status_code}: {response.get('description', '')}\n"
-                    
-                    content = response.get("content", {})
-                    json_content = content.get("application/json", {})
-                    schema = json_content.get("schema", {})
-                    ref = schema.get("$ref")
-                    
-                    if ref:
-                        parsed_open_api_string += f"        Response Schema Ref: {ref}\n"
-                        parsed_open_api_string += f"        Response Schema:\n"
-                        parsed_open_api_string += ParserFunctions.get_response_schema(openapi_data=openapi_data, schema_name=ref.split("/")[-1])
-                if 'parameters' in method_data:
-                    parsed_open_api_string += "    Parameters:\n"
-                    for param in method_data["parameters"]:
-                        parsed_open_api_string += f"      - Name: {param['name']}, In: {param['in']}, Type: {param['schema']['type']}\n"
-                parsed_open_api_string += "\n"
-
-            parsed_string_prompt = FastApiPrompts.pytest_test_scenarios_prompt + "\n\n" + parsed_open_api_string
-            test_scenario = OpenRouter.send_request_to_openrouter(
-                api_key=api_key,
-                model_name=open_router_models,
-                prompt=parsed_string_prompt
-            )
-
-            parsed_open_api_data[path] = {
-                "parsed_open_api_string": parsed_open_api_string,
-                "test_scenario": test_scenario,
-                "relative_paths": OpenRouter.get_relative_endpoints(endpoint_path=path, openapi_data=openapi_data, api_key=api_key, open_router_model=open_router_models),
-            }
+    def generate_path_scenario(openapi_data: dict, path: str, api_key: Optional[str] = None, open_router_models: Optional[str] = None, refine_related_with_llm: bool = False) -> Dict[str, str]:
+        parsed_open_api_string = EndpointRenderer.for_spec(openapi_data).render(path)
+        test_scenario = ParserFunctions.request_test_scenarios(parsed_open_api_string=parsed_open_api_string, api_key=api_key, open_router_models=open_router_models)
+        return ParserFunctions.build_path_scenario(openapi_data, path, parsed_open_api_string, test_scenario, api_key, open_router_models, refine_related_with_llm)
+
+    def request_test_scenarios(parsed_open_api_string: str, api_key: Optional[str] = None, open_router_models: Optional[str] = None) -> str:
+        parsed_string_prompt = FastApiPrompts.pytest_test_scenarios_prompt + "\n\n" + parsed_open_api_string
+        return OpenRouter.send_request_to_openrouter(
+            api_key=api_key,
+            model_name=open_router_models,
+            prompt=parsed_string_prompt,
+            stop_when=scenario_list_complete,
+        )
+
+    def build_path_scenario(openapi_data: dict, path: str, parsed_open_api_string: str, test_scenario: str, api_key: Optional[str] = None, open_router_models: Optional[str] = None, refine_related_with_llm: bool = False) -> Dict[str, str]:
+        return {
+            "parsed_open_api_string": parsed_open_api_string,
+            "test_scenario": test_scenario,
+            "relative_paths": OpenRouter.get_relative_endpoints(endpoint_path=path, openapi_data=openapi_data, api_key=api_key, open_router_model=open_router_models, refine_with_llm=refine_related_with_llm),
+        }
 
+    def plan_scenario_batches(openapi_data: dict, paths: List[str], batch_tokens: Optional[int] = None) -> List[List[str]]:
+        """
+        Groups consecutive paths so each scenario prompt (instructions included) stays within batch_tokens.
+        Without a budget every path is its own batch.
+        """
+        if not batch_tokens:
+            return [[path] for path in paths]
+        renderer = EndpointRenderer.for_spec(openapi_data)
+        preamble_tokens = estimate_tokens(FastApiPrompts.pytest_test_scenarios_prompt)
+        batches, current, current_tokens = [], [], preamble_tokens
+        for path in paths:
+            path_tokens = estimate_tokens(renderer.render(path))
+            if current and current_tokens + path_tokens > batch_tokens:
+                batches.append(current)
+                current, current_tokens = [], preamble_tokens
+            current.append(path)
+            current_tokens += path_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def split_batch_scenarios(test_scenarios: str, paths: List[str]) -> Dict[str, str]:
+        """
+        Maps the testcase_<Path> blocks of a batched reply back to their paths. Blocks whose name doesn't match
+        any path of the batch (even after normalization) are dropped.
+        """
+        def normalize(name: str) -> str:
+            return re.sub(r"[^a-z0-9]", "", name.lower())
+
+        by_name = {path: path for path in paths}
+        by_normalized = {normalize(path): path for path in paths}
+        matched: Dict[str, List[str]] = {}
+        for block in OpenRouter.parse_scenarios(test_scenarios):
+            try:
+                name = ParserFunctions.get_endpoint_names_from_scenario_result(block).split("\n")[0].strip().strip("`'\"")
+            except TypeError:
+                continue
+            path = by_name.get(name) or by_normalized.get(normalize(name))
+            if path:
+                matched.setdefault(path, []).append(block)
+        return {path: "\n\n".join(blocks) for path, blocks in matched.items()}
+
+    def generate_batch_scenarios(openapi_data: dict, paths: List[str], api_key: Optional[str] = None, open_router_models: Optional[str] = None, refine_related_with_llm: bool = False) -> Dict[str, Dict[str, str]]:
+        if len(paths) == 1:
+            return {paths[0]: ParserFunctions.generate_path_scenario(openapi_data, paths[0], api_key, open_router_models, refine_related_with_llm)}
+
+        renderer = EndpointRenderer.for_spec(openapi_data)
+        batch_reply = ParserFunctions.request_test_scenarios(
+            parsed_open_api_string="".join(renderer.render(path) for path in paths),
+            api_key=api_key,
+            open_router_models=open_router_models,
+        )
+        split_scenarios = ParserFunctions.split_batch_scenarios(batch_reply, paths)
+        generated = {}
+        for path in paths:
+            if path in split_scenarios:
+                generated[path] = ParserFunctions.build_path_scenario(openapi_data, path, renderer.render(path), split_scenarios[path], api_key, open_router_models, refine_related_with_llm)
+            else:
+                # Missing or mangled in the batch reply: ask for this path on its own.
+                generated[path] = ParserFunctions.generate_path_scenario(openapi_data, path, api_key, open_router_models, refine_related_with_llm)
+        return generated
+
+    def parse_open_api(openapi_data: dict, api_key: Optional[str] = None, open_router_models: Optional[str] = None, concurrency: int = 1, refine_related_with_llm: bool = False, batch_tokens: Optional[int] = None, paths: Optional[List[str]] = None) -> str:
+        """
+        Generates test scenarios for every path of the spec, or only for `paths` when given. With concurrency > 1 the OpenRouter calls of
+        different batches are sent in parallel; progress is reported as paths finish and the output keeps the spec order.
+        With batch_tokens, several paths share one scenario prompt up to that token budget.
+        """
+        #todo - add api_key and open router model check method here
+        paths = [path for path in openapi_data["paths"] if paths is None or path in paths]
+        batches = ParserFunctions.plan_scenario_batches(openapi_data, paths, batch_tokens)
+        generated_scenarios = {}
+
+        with tqdm(total=len(paths), desc="👷 Generating Test Scenarios", unit="endpoint") as progress:
+            if concurrency <= 1:
+                for batch in batches:
+                    generated_scenarios.update(ParserFunctions.generate_batch_scenarios(openapi_data=openapi_data, paths=batch, api_key=api_key, open_router_models=open_router_models, refine_related_with_llm=refine_related_with_llm))
+                    progress.set_postfix_str(batch[-1])
+                    progress.update(len(batch))
+            else:
+                executor = ThreadPoolExecutor(max_workers=concurrency)
+                try:
+                    futures = {
+                        executor.submit(ParserFunctions.generate_batch_scenarios, openapi_data, batch, api_key, open_router_models, refine_related_with_llm): batch
+                        for batch in batches
+                    }
+                    for future in as_completed(futures):
+                        batch = futures[future]
+                        generated_scenarios.update(future.result())
+                        progress.set_postfix_str(batch[-1])
+                        progress.update(len(batch))
+                finally:
+                    executor.shutdown(wait=True, cancel_futures=True)
+
+        parsed_open_api_data = {path: generated_scenarios[path] for path in paths}
         json_output = json.dumps(parsed_open_api_data, indent=2)
         return json_output
 
-    def get_response_schema(openapi_data: dict, schema_name:str) -> Optional[Dict[str, Any]]:
-        schema_data = openapi_data["components"]["schemas"].get(schema_name)
-        schema_string = """"""
-        for schema_item in schema_data["properties"]:
-            schema_string += f"     Schema Item: {schema_item}\n"
-            try:
-                schema_string += f"         Type: {schema_data['properties'][schema_item]['type']}\n"
-                schema_string += f"         Title: {schema_data['properties'][schema_item]['title']}\n"
-            except KeyError:
-                for anyof_item in schema_data["properties"][schema_item]["anyOf"]:
-                    if "items" in anyof_item:
-                        ParserFunctions.get_response_schema(openapi_data=openapi_data, schema_name=anyof_item["items"]["$ref"].split("/")[-1])
-                        schema_string += f"         Type: {anyof_item['items']['$ref']}\n"
-                    schema_string += f"         Type: {anyof_item['type']}\n"
-        return schema_string
+    def get_response_schema(openapi_data: dict, schema_name:str) -> str:
+        return SchemaIndex.for_spec(openapi_data).render_schema(schema_name)
 
     def find_auth_endpoint(openapi_spec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         security_schemes = openapi_spec.get('components', {}).get('securitySchemes', {})
@@ -188,17 +170,17 @@ class ParserFunctions:
                         schema_ref = response_content['application/json'].get('schema', {}).get('$ref', '')
                         if schema_ref:
                             schema_name = schema_ref.split('/')[-1]
-                            schema_props = openapi_spec['components']['schemas'].get(schema_name, {}).get('properties', {})
+                            schema_props = SchemaIndex.for_spec(openapi_spec).resolve(schema_name)["properties"]
                             if 'access_token' in schema_props:
                                 return ParserFunctions.parse_endpoint_details(openapi_spec, path, http_method, method_data)
         return None
 
     def parse_endpoint_details(openapi_spec: Dict[str, Any], path: str, method: str, method_data: Dict[str, Any]) -> Dict[str, Any]:
         def get_response_schema_details(schema_name: str) -> str:
-            schema = openapi_spec["components"]["schemas"].get(schema_name, {})
+            schema = SchemaIndex.for_spec(openapi_spec).resolve(schema_name)
             details = []
-            for prop, prop_details in schema.get("properties", {}).items():
-                detail = f"  - {prop}:\n    Type: {prop_details.get('type', 'unknown')}"
+            for prop, prop_details in schema["properties"].items():
+                detail = f"  - {prop}:\n    Type: {SchemaIndex.describe_type(prop_details, default='unknown')}"
                 if 'title' in prop_details:
                     detail += f"\n    Title: {prop_details['title']}"
                 details.append(detail)
@@ -0,0 +1,160 @@
+import threading
+from typing import Any, Dict, List, Set
+from api.parser.spec_cache import SpecCache
+
+SCHEMA_REF_PREFIX = "#/components/schemas/"
+
+class SchemaIndex:
+    """
+    Resolved view of an OpenAPI document's components/schemas, compiled once per spec. Follows $ref chains,
+    merges allOf parts, describes anyOf/oneOf unions and arrays, and stops at reference cycles. Resolution and
+    rendering are memoized per schema, so endpoints sharing schemas don't resolve them again.
+    """
+    _indexes = SpecCache()
+
+    def __init__(self, openapi_data: dict):
+        self.schemas: Dict[str, Any] = (openapi_data or {}).get("components", {}).get("schemas", {}) or {}
+        self.resolutions = 0
+        self._resolved: Dict[str, Dict[str, Any]] = {}
+        self._rendered: Dict[str, str] = {}
+        self._resolving: Set[str] = set()
+        # Names answered with the cycle placeholder during the current resolution.
+        self._cycle_hits: List[str] = []
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def for_spec(openapi_data: dict) -> "SchemaIndex":
+        """
+        Returns the index of the given spec object, compiling it on first use.
+        """
+        return SchemaIndex._indexes.get(openapi_data, SchemaIndex)
+
+    @staticmethod
+    def clear_cache() -> None:
+        SchemaIndex._indexes.clear()
+
+    @staticmethod
+    def ref_name(ref: str) -> str:
+        return ref.split("/")[-1]
+
+    def resolve(self, name: str) -> Dict[str, Any]:
+        """
+        Returns {"properties", "required", "type_description", "found"} of a named schema with $ref and allOf flattened.
+        """
+        with self._lock:
+            cached = self._resolved.get(name)
+            if cached is not None:
+                return cached
+            if name in self._resolving:
+                self._cycle_hits.append(name)
+                return {"properties": {}, "required": [], "type_description": name, "found": True}
+            self._resolving.add(name)
+            hits_before = len(self._cycle_hits)
+            try:
+                self.resolutions += 1
+                schema = self.schemas.get(name)
+                if schema is None:
+                    resolved = {"properties": {}, "required": [], "type_description": "Unknown", "found": False}
+                else:
+                    resolved = self.flatten(schema)
+            finally:
+                self._resolving.discard(name)
+                cut_short = any(hit in self._resolving for hit in self._cycle_hits[hits_before:])
+                if not self._resolving:
+                    self._cycle_hits.clear()
+            # A result with a placeholder for a schema further up the chain depends on where resolution started;
+            # only results that are cut at the schema itself are the same from every entry point.
+            if not cut_short:
+                self._resolved[name] = resolved
+            return resolved
+
+    def flatten(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        ref = schema.get("$ref")
+        if ref:
+            return self.resolve(SchemaIndex.ref_name(ref))
+        properties = dict(schema.get("properties", {}))
+        required = list(schema.get("required", []))
+        for part in schema.get("allOf", []):
+            merged = self.flatten(part)
+            for prop_name, prop_info in merged["properties"].items():
+                properties.setdefault(prop_name, prop_info)
+            required.extend(item for item in merged["required"] if item not in required)
+        return {
+            "properties": properties,
+            "required": required,
+            "type_description": SchemaIndex.describe_type(schema),
+            "found": True,
+        }
+
+    @staticmethod
+    def describe_type(schema: Dict[str, Any], default: str = "Unknown") -> str:
+        if not isinstance(schema, dict) or not schema:
+            return default
+        if "$ref" in schema:
+            return SchemaIndex.ref_name(schema["$ref"])
+        for union in ("anyOf", "oneOf"):
+            if union in schema:
+                return " | ".join(SchemaIndex.describe_type(variant, default) for variant in schema[union])
+        if "allOf" in schema:
+            return " & ".join(SchemaIndex.describe_type(part, default) for part in schema["allOf"])
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            schema_type = " | ".join(schema_type)
+        if schema_type == "array":
+            return f"array[{SchemaIndex.describe_type(schema.get('items', {}), default)}]"
+        if "enum" in schema:
+            return f"{schema_type or 'enum'} (enum: {', '.join(str(value) for value in schema['enum'])})"
+        return schema_type or default
+
+    def referenced_schemas(self, name: str) -> Set[str]:
+        """
+        Names of all schemas reachable from the given one through properties, items, unions and allOf.
+        """
+        seen: Set[str] = set()
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            if current in seen or current not in self.schemas:
+                continue
+            seen.add(current)
+            pending.extend(SchemaIndex.collect_refs(self.schemas[current]))
+        return seen
+
+    @staticmethod
+    def collect_refs(node: Any) -> List[str]:
+        refs = []
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "$ref" and isinstance(value, str) and value.startswith(SCHEMA_REF_PREFIX):
+                    refs.append(SchemaIndex.ref_name(value))
+                else:
+                    refs.extend(SchemaIndex.collect_refs(value))
+        elif isinstance(node, list):
+            for item in node:
+                refs.extend(SchemaIndex.collect_refs(item))
+        return refs
+
+    def render_schema(self, name: str) -> str:
+        """
+        Prompt rendering of a schema's properties, memoized per schema name.
+        """
+        rendered = self._rendered.get(name)
+        if rendered is not None:
+            return rendered
+        resolved = self.resolve(name)
+        if not resolved["found"]:
+            rendered = f"     Unable to parse schema: {name}\n"
+        elif not resolved["properties"]:
+            rendered = f"     Type: {resolved['type_description']}\n"
+        else:
+            parts = []
+            for prop_name, prop_info in resolved["properties"].items():
+                parts.append(f"     Schema Item: {prop_name}\n")
+                parts.append(f"         Type: {SchemaIndex.describe_type(prop_info)}\n")
+                title = prop_info.get("title", "") if isinstance(prop_info, dict) else ""
+                if title:
+                    parts.append(f"         Title: {title}\n")
+            rendered = "".join(parts)
+        with self._lock:
+            self._rendered[name] = rendered
+        return rendered
@@ -0,0 +1,35 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+
+DEFAULT_MAX_SPECS = 16
+
+class SpecCache:
+    """
+    Per-spec objects (schema index, renderer, dependency graph) keyed by the identity of the spec dict. Lookups are
+    O(1) and only the `max_specs` most recently used specs are kept, so a long batch over many services doesn't keep
+    every spec alive. The spec is held next to its value so its id can't be reused while the entry exists.
+    """
+    def __init__(self, max_specs: int = DEFAULT_MAX_SPECS):
+        self.max_specs = max_specs
+        self._entries: "OrderedDict[int, Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, spec: Any, build: Callable[[Any], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(id(spec))
+            if entry is not None and entry[0] is spec:
+                self._entries.move_to_end(id(spec))
+                return entry[1]
+            value = build(spec)
+            self._entries[id(spec)] = (spec, value)
+            while len(self._entries) > self.max_specs:
+                self._entries.popitem(last=False)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,6 @@
+from .pipeline import PipelineStage, StagePipeline
+
+__all__ = [
+    "PipelineStage",
+    "StagePipeline",
+]
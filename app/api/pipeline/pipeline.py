@@ -0,0 +1,98 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional
+
+_STOP = object()
+
+class PipelineStage:
+    """
+    A single step of a StagePipeline. `func` receives the output of the previous stage and is run by `workers` threads.
+    """
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+
+class StagePipeline:
+    """
+    Streams items through a chain of stages connected by bounded queues, so each item moves on as soon as its
+    previous stage is done. Results are returned in input order. The first error raised by any stage stops the
+    pipeline and is re-raised from run().
+    """
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 4):
+        if not stages:
+            raise ValueError("StagePipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+
+    def run(self, items: Iterable[Any], on_item_done: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        queues.append(queue.Queue())
+        errors: List[BaseException] = []
+        failed = threading.Event()
+        remaining_workers = [stage.workers for stage in self.stages]
+        counter_lock = threading.Lock()
+
+        def worker(stage_index: int):
+            stage = self.stages[stage_index]
+            inbox, outbox = queues[stage_index], queues[stage_index + 1]
+            try:
+                while True:
+                    entry = inbox.get()
+                    if entry is _STOP:
+                        break
+                    if failed.is_set():
+                        continue
+                    index, value = entry
+                    try:
+                        outbox.put((index, stage.func(value)))
+                    except BaseException as e:
+                        with counter_lock:
+                            errors.append(e)
+                        failed.set()
+            finally:
+                with counter_lock:
+                    remaining_workers[stage_index] -= 1
+                    last_worker = remaining_workers[stage_index] == 0
+                if last_worker:
+                    next_workers = self.stages[stage_index + 1].workers if stage_index + 1 < len(self.stages) else 1
+                    for _ in range(next_workers):
+                        outbox.put(_STOP)
+
+        threads = [
+            threading.Thread(target=worker, args=(stage_index,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+            for stage_index, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        def feed():
+            try:
+                for index, item in enumerate(items):
+                    if failed.is_set():
+                        break
+                    queues[0].put((index, item))
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_STOP)
+
+        feeder = threading.Thread(target=feed, name="pipeline-feeder", daemon=True)
+        feeder.start()
+
+        results = {}
+        while True:
+            entry = queues[-1].get()
+            if entry is _STOP:
+                break
+            index, value = entry
+            results[index] = value
+            if on_item_done and not failed.is_set():
+                on_item_done(index, value)
+
+        feeder.join()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return [results[index] for index in sorted(results)]
@@ -0,0 +1,89 @@
+import re
+from typing import List, Optional
+from api.openrouter.tokens import estimate_tokens
+
+DEFAULT_CONTEXT_TOKENS = 32000
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n... [truncated] ...\n"
+
+class ContextSection:
+    def __init__(self, body: str, title: str = "", priority: Optional[int] = 0, truncate: Optional[str] = None, deduplicate: bool = True):
+        self.body = body
+        self.title = title
+        # None marks a section that may be truncated but never dropped.
+        self.priority = priority
+        # "head" keeps the start, "tail" keeps the end, "middle" keeps both ends; None drops the whole section.
+        self.truncate = truncate
+        self.deduplicate = deduplicate
+
+    def render(self) -> str:
+        return f"{self.title}\n{self.body}" if self.title else self.body
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.render())
+
+class ContextAssembler:
+    """
+    Builds a prompt from titled sections within a token budget. Sections whose body repeats an earlier one are
+    dropped. When the prompt is still too large, the lowest-priority sections are truncated or dropped first
+    (later sections go first among equal priorities).
+    """
+    def __init__(self, budget_tokens: int = DEFAULT_CONTEXT_TOKENS):
+        self.budget_tokens = budget_tokens
+        self.sections: List[ContextSection] = []
+
+    def add(self, body: str, title: str = "", priority: Optional[int] = 0, truncate: Optional[str] = None, deduplicate: bool = True) -> "ContextAssembler":
+        if body and body.strip():
+            self.sections.append(ContextSection(body=body, title=title, priority=priority, truncate=truncate, deduplicate=deduplicate))
+        return self
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip()
+
+    @staticmethod
+    def truncate_text(text: str, max_chars: int, mode: str) -> str:
+        if len(text) <= max_chars:
+            return text
+        max_chars = max(0, max_chars - len(TRUNCATION_MARKER))
+        if mode == "head":
+            return text[:max_chars] + TRUNCATION_MARKER
+        if mode == "tail":
+            return TRUNCATION_MARKER + text[len(text) - max_chars:]
+        half = max_chars // 2
+        return text[:half] + TRUNCATION_MARKER + text[len(text) - (max_chars - half):]
+
+    def deduplicated(self) -> List[ContextSection]:
+        kept: List[ContextSection] = []
+        kept_bodies: List[str] = []
+        for section in self.sections:
+            body = ContextAssembler.normalize(section.body)
+            if section.deduplicate and any(body in kept_body for kept_body in kept_bodies):
+                continue
+            kept.append(section)
+            if section.deduplicate:
+                kept_bodies.append(body)
+        return kept
+
+    def build(self) -> str:
+        sections = self.deduplicated()
+        total = sum(section.tokens() for section in sections)
+        if total > self.budget_tokens:
+            removable = sorted(
+                (index for index, section in enumerate(sections) if section.priority is not None or section.truncate),
+                key=lambda index: (sections[index].priority is None, sections[index].priority or 0, -index),
+            )
+            for index in removable:
+                if total <= self.budget_tokens:
+                    break
+                section = sections[index]
+                overflow = total - self.budget_tokens
+                section_tokens = section.tokens()
+                if section.truncate and section_tokens > overflow:
+                    section.body = ContextAssembler.truncate_text(section.body, (section_tokens - overflow) * CHARS_PER_TOKEN - len(section.title), section.truncate)
+                    total += section.tokens() - section_tokens
+                elif section.priority is not None:
+                    total -= section_tokens
+                    sections[index] = None
+            sections = [section for section in sections if section is not None]
+        return "\n\n".join(section.render() for section in sections)
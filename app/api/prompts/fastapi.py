@@ -109,6 +109,27 @@ class FastApiPrompts:
     Extra contextual information to assist with test generation is provided below
 
 
+    """
+
+    pytest_function_repair_prompt = """
+    You are a Senior Python developer with over 20 years of experience. Your task is to fix the failing pytest test functions given below based on their error output.
+
+    Instructions:
+        - Your response must contain only pure Python code. Do not use markdown formatting, code blocks, or explanations.
+        - Return ONLY the failing test functions (or test classes) listed below, rewritten, with the same names.
+        - Do not return imports, fixtures, helpers or any other test; they are shared with tests that already pass and must not change.
+        - Use only the imports, fixtures and helpers from the shared code. If a fix needs something else, import it inside the function.
+        - Use FastAPI's TestClient for **all** API requests. Never use localhost, `requests`, or external HTTP clients.
+        - If an endpoint returns a 422, assert the presence of the "detail" field in the response.
+        - Only use status codes explicitly defined in the scenario or OpenAPI schema. Avoid making up expected codes.
+
+    Error Handling:
+        - If a test cannot be fixed due to missing functionality or unclear API behavior, annotate it with:
+            @pytest.mark.skip(reason="explanation")
+
+    Extra contextual information to assist with the fix is provided below
+
+
     """
 
     semantic_endpoint_extraction_prompt = """
@@ -1,45 +1,133 @@
+import hashlib
 import os
 import re
+import shutil
 import sys
 import subprocess
-from importlib.util import find_spec
+import tempfile
+import threading
+import uuid
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Set
+from typing import Callable, List, Optional, Set, Tuple
 from api.openrouter.openrouter import OpenRouter
+from api.openrouter.streaming import code_block_complete
 from api.prompts.prompts import FastApiPrompts
+from api.prompts.context_assembler import DEFAULT_CONTEXT_TOKENS, ContextAssembler
+from config.cache_paths import get_cache_dir
 from config.rich_console import rich_console
 from api.file_functions.file_functions import FileFunctions
+from api.test_runner.function_splicer import TestFileLayout
+from api.test_runner.test_report import OUTCOME_FAILED, PYTEST_NO_TESTS_COLLECTED, TestReport
+from api.test_runner.venv_index import VenvPackageIndex
+from api.test_runner.warm_worker import WarmWorkerPool
+
+# Outcomes of attempt_test_fix_loop, stored as the status of a finished endpoint in the run journal.
+FIX_PASSED = "passed"
+FIX_COMMENTED_OUT = "commented_out"
+FIX_FAILED = "failed"
 
 class FastAPITestRunner:
     """
     Test runners that can be used for FastAPI test runner, enviorment setup, and package installation and etc.
     """
+    # Fix loops may run in parallel (pipeline mode); only one of them may ask the user at a time.
+    prompt_lock = threading.Lock()
+    # Serializes requirements.txt installs; the stamps make every install after the first one a no-op.
+    requirements_lock = threading.Lock()
+    _projects_without_requirements = set()
+    # Batch runs are unattended: a loop that runs out of attempts gives up instead of asking.
+    interactive = True
+    # Process-wide cap on concurrent test runs, shared by every fix loop (None = unlimited).
+    test_slots: Optional[threading.BoundedSemaphore] = None
+    # Set by configure_warm_workers; None runs every test file in a fresh pytest subprocess.
+    warm_workers: Optional[WarmWorkerPool] = None
+    warm_worker_args = ["-vv", "-s", "-p", "no:cacheprovider"]
+    _warm_worker_preloads = {}
+
     def __init__(self):
         pass
 
+    @staticmethod
+    def configure_warm_workers(enabled: bool, size: int = 1, max_runs: int = 50, timeout: float = 300.0) -> None:
+        if FastAPITestRunner.warm_workers is not None:
+            FastAPITestRunner.warm_workers.close()
+        FastAPITestRunner.warm_workers = WarmWorkerPool(size=size, max_runs=max_runs, timeout=timeout) if enabled else None
+
+    @staticmethod
+    def configure_interactive(enabled: bool) -> None:
+        FastAPITestRunner.interactive = enabled
+
+    @staticmethod
+    def configure_test_slots(limit: Optional[int]) -> None:
+        FastAPITestRunner.test_slots = threading.BoundedSemaphore(limit) if limit else None
+
+    @staticmethod
+    def ask_to_continue(question: str) -> str:
+        if not FastAPITestRunner.interactive:
+            return "n"
+        with FastAPITestRunner.prompt_lock:
+            return input(question).strip().lower()
+
+    @staticmethod
+    def warm_worker_preload(project_path: str) -> List[str]:
+        """
+        Modules imported once by a warm worker: the FastAPI app module (if it can be found) and fastapi's TestClient.
+        """
+        if project_path not in FastAPITestRunner._warm_worker_preloads:
+            modules = ["fastapi", "fastapi.testclient"]
+            entrypoint = FileFunctions.find_app_entrypoint(project_path)
+            if entrypoint:
+                module = Path(entrypoint).with_suffix("")
+                modules.append(".".join(module.parts[:-1] if module.name == "__init__" else module.parts))
+            FastAPITestRunner._warm_worker_preloads[project_path] = modules
+        return FastAPITestRunner._warm_worker_preloads[project_path]
+
+    @staticmethod
+    def requirements_stamp(req_file: Path, python_exec: str) -> tuple[Path, str]:
+        """
+        Stamp file of a (requirements.txt, interpreter) pair and the fingerprint it must contain to skip the install.
+        """
+        interpreter = str(Path(python_exec).absolute())
+        name = hashlib.sha256(f"{req_file.resolve()}\0{interpreter}".encode("utf-8")).hexdigest()
+        fingerprint = hashlib.sha256(req_file.read_bytes() + b"\0" + interpreter.encode("utf-8")).hexdigest()
+        return get_cache_dir("requirements-stamps") / name, fingerprint
+
     @staticmethod
     def install_requirements_txt(project_path: str, python_venv: str = None) -> bool:
         req_file = Path(project_path) / "requirements.txt"
         if req_file.exists():
-            rich_console.info_string("Installing requirements.txt packages...")
-            try:
-                result = subprocess.run(
-                    [sys.executable, "-m", "pip", "install", "-r", str(req_file)],
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    timeout=120
-                )
-                rich_console.success_string("requirements.txt packages installed")
-                return True
-            except subprocess.CalledProcessError as e:
-                rich_console.error_string(f"❌ Failed to install requirements.txt. Error output:\n{e.output}")
-                return False
-            except subprocess.TimeoutExpired:
-                rich_console.warning_string("⏰ requirements.txt installation timed out")
-                return False
+            python_exec = python_venv or sys.executable
+            with FastAPITestRunner.requirements_lock:
+                stamp_file, fingerprint = FastAPITestRunner.requirements_stamp(req_file, python_exec)
+                if stamp_file.exists() and stamp_file.read_text(encoding="utf-8") == fingerprint:
+                    return True
+                rich_console.info_string("Installing requirements.txt packages...")
+                try:
+                    result = subprocess.run(
+                        [python_exec, "-m", "pip", "install", "-r", str(req_file)],
+                        check=True,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        text=True,
+                        timeout=120
+                    )
+                    stamp_file.write_text(fingerprint, encoding="utf-8")
+                    VenvPackageIndex.forget(python_exec)
+                    rich_console.success_string("requirements.txt packages installed")
+                    return True
+                except subprocess.CalledProcessError as e:
+                    rich_console.error_string(f"❌ Failed to install requirements.txt. Error output:\n{e.output}")
+                    return False
+                except subprocess.TimeoutExpired:
+                    rich_console.warning_string("⏰ requirements.txt installation timed out")
+                    return False
         else:
+            with FastAPITestRunner.requirements_lock:
+                if project_path in FastAPITestRunner._projects_without_requirements:
+                    return True
+                FastAPITestRunner._projects_without_requirements.add(project_path)
             rich_console.info_string(f"ℹ️ No requirements.txt file found at {project_path}")
             return True
         
@@ -69,74 +157,148 @@ class FastAPITestRunner:
         return base_requirements.union(detected)
     
     @staticmethod
-    def install_packages(packages: Set[str], timeout: int = 60, python_venv:str = sys.executable) -> bool:
+    def install_packages(packages: Set[str], timeout: int = 60, python_venv:str = sys.executable, project_path: str = None) -> bool:
         if not packages:
             return True
-            
-        missing = [pkg for pkg in packages if not find_spec(pkg)]
+
+        package_index = VenvPackageIndex.for_interpreter(python_venv)
+        missing = package_index.missing_modules(packages, project_path=project_path)
         if not missing:
             return True
-
-        rich_console.info_string(f"🔍 Missing packages detected: {', '.join(missing)}")
+        return package_index.install(missing, timeout=timeout)
         
-        try:
-            cmd = [
-                python_venv, "-m", "pip", "install",
-                "--disable-pip-version-check",
-                "--no-warn-script-location",
-                *missing
-            ]
-            
+    @staticmethod
+    def collect_test_groups(python_exec: str, test_file: str, project_path: str) -> List[List[str]]:
+        """
+        Collects the node ids of `test_file` and groups them the way pytest-xdist's loadscope does: tests of a class
+        stay together, module-level test functions are independent.
+        """
+        result = subprocess.run(
+            [python_exec, "-m", "pytest", test_file, "--collect-only", "-q", "-p", "no:cacheprovider"],
+            cwd=project_path,
+            capture_output=True,
+            text=True
+        )
+        groups = {}
+        for line in result.stdout.splitlines():
+            node_id = line.strip()
+            if not node_id.startswith(test_file + "::"):
+                continue
+            parts = node_id.split("::")
+            scope = "::".join(parts[:2]) if len(parts) > 2 else node_id
+            groups.setdefault(scope, []).append(node_id)
+        return list(groups.values())
+
+    @staticmethod
+    def run_test_shards(python_exec: str, test_file: str, project_path: str, workers: int, report_dir: str) -> Optional[tuple[str, TestReport]]:
+        """
+        Runs the tests of `test_file` spread over up to `workers` pytest processes and merges their output and reports.
+        Returns None when there is nothing worth splitting, so the caller runs the file in one process.
+        """
+        groups = FastAPITestRunner.collect_test_groups(python_exec, test_file, project_path)
+        if not groups:
+            # Collection errors (syntax, imports) are reported by the regular single-process run.
+            return None
+        shard_count = min(workers, len(groups))
+        if shard_count < 2:
+            return None
+
+        shards: List[List[str]] = [[] for _ in range(shard_count)]
+        for group in sorted(groups, key=len, reverse=True):
+            min(shards, key=len).extend(group)
+
+        def run_shard(index: int) -> tuple[subprocess.CompletedProcess, TestReport]:
+            report_path = str(Path(report_dir) / f"shard_{index}.xml")
             result = subprocess.run(
-                cmd,
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                timeout=timeout
+                [python_exec, "-m", "pytest", *shards[index], "-vv", "-s", "-p", "no:cacheprovider", f"--junitxml={report_path}"],
+                cwd=project_path,
+                capture_output=True,
+                text=True
             )
-            rich_console.success_string("✅ Successfully installed packages")
-            return True
-        except subprocess.CalledProcessError as e:
-            rich_console.error_string(f"❌ Failed to install packages. Error output:\n {e.output}")
-            return False
-        except subprocess.TimeoutExpired:
-            rich_console.warning_string(f"⏰ Package installation timed out after {timeout} seconds")
+            return result, TestReport.from_junit_xml(report_path, result.returncode)
+
+        with ThreadPoolExecutor(max_workers=shard_count) as executor:
+            results = list(executor.map(run_shard, range(shard_count)))
+
+        output = []
+        for index, (result, report) in enumerate(results, start=1):
+            output.append(f"===== shard {index}/{shard_count}: {report.summary_string()} =====")
+            output.append(result.stdout + "\n" + result.stderr)
+        report = TestReport.merge(report for _, report in results)
+        output.append(f"===== {shard_count} shards: {report.summary_string()} =====")
+        return "\n".join(output), report
+
+    @staticmethod
+    def run_tests_safely(test_code: str, project_path: str, python_venv: str = None, workers: int = 1, tests: Optional[List[str]] = None) -> tuple[str, TestReport]:
+        """
+        Runs `test_code` with pytest in the project and returns (output, report). Outcomes come from pytest's junit xml.
+        `tests` limits the run to the given test functions or classes of the module.
+        """
+        with FastAPITestRunner.test_slots or nullcontext():
+            output, report = FastAPITestRunner.execute_tests(test_code, project_path, python_venv, workers, tests)
+        if report.returncode == PYTEST_NO_TESTS_COLLECTED:
+            # Nothing to collect is fine for code without tests, e.g. a combined file whose endpoints were all commented out.
+            layout = TestFileLayout.parse(test_code)
+            report.expects_tests = layout is None or bool(layout.units)
+        return output, report
 
-            return False
-        
     @staticmethod
-    def run_tests_safely(test_code: str, project_path: str, python_venv: str = None) -> tuple[str, bool]:
+    def execute_tests(test_code: str, project_path: str, python_venv: str = None, workers: int = 1, tests: Optional[List[str]] = None) -> tuple[str, TestReport]:
         if python_venv:
             python_exec = Path(python_venv) / ("Scripts" if os.name == "nt" else "bin") / "python"
             if not python_exec.exists():
-                return f"🚨 Python executable not found in venv: {python_exec}", False
+                message = f"🚨 Python executable not found in venv: {python_exec}"
+                return message, TestReport(returncode=-1, problem=message)
         else:
             python_exec = sys.executable
 
             if not FastAPITestRunner.install_requirements_txt(project_path, str(python_exec)):
-                return "", False
+                return "", TestReport(returncode=-1, problem="Failed to install requirements.txt")
 
-        if not FastAPITestRunner.install_packages(packages=FastAPITestRunner.detect_required_packages(test_code), python_venv=str(python_exec)):
+        required_packages = FastAPITestRunner.detect_required_packages(test_code)
+        if not FastAPITestRunner.install_packages(packages=required_packages, python_venv=str(python_exec), project_path=project_path):
             rich_console.error_string("❌ Failed to install required packages.")
-            return "", False
+            unavailable = sorted(required_packages & VenvPackageIndex.for_interpreter(str(python_exec)).unavailable)
+            return "", TestReport(returncode=-1, problem=f"Failed to install required packages: {', '.join(unavailable) or 'pip timed out'}")
 
         test_dir = Path(project_path)
-        test_file = test_dir / "test_runner.py"
+        # Unique per run so concurrent runs in the same project don't overwrite each other's file.
+        test_file = test_dir / f"test_runner_{uuid.uuid4().hex[:8]}.py"
+        report_dir = tempfile.mkdtemp(prefix="testpilotai-")
+        report_path = str(Path(report_dir) / "report.xml")
         try:
             test_file.write_text(test_code, encoding="utf-8")
+            targets = [f"{test_file.name}::{test}" for test in tests] if tests else [test_file.name]
+            if workers > 1 and not tests:
+                sharded = FastAPITestRunner.run_test_shards(str(python_exec), test_file.name, project_path, workers, report_dir)
+                if sharded is not None:
+                    return sharded
+            if FastAPITestRunner.warm_workers is not None:
+                try:
+                    output, returncode = FastAPITestRunner.warm_workers.run(
+                        python_exec=str(python_exec),
+                        project_path=project_path,
+                        test_file=targets[0],
+                        pytest_args=[*targets[1:], *FastAPITestRunner.warm_worker_args, f"--junitxml={report_path}"],
+                        preload_modules=FastAPITestRunner.warm_worker_preload(project_path),
+                    )
+                    return output, TestReport.from_junit_xml(report_path, returncode)
+                except RuntimeError as e:
+                    rich_console.warning_string(f"⚠️ {e}, falling back to a pytest subprocess")
             result = subprocess.run(
-                [str(python_exec), "test_runner.py"],
+                [str(python_exec), "-m", "pytest", *targets, "-vv", "-s", f"--junitxml={report_path}"],
                 cwd=project_path,
                 capture_output=True,
                 text=True
             )
 
             output = result.stdout + "\n" + result.stderr
-            return output, result.returncode == 0
+            return output, TestReport.from_junit_xml(report_path, result.returncode)
         except Exception as e:
-            return f"🔥 Unexpected error: {str(e)}", False
+            message = f"🔥 Unexpected error: {str(e)}"
+            return message, TestReport(returncode=-1, problem=message)
         finally:
+            shutil.rmtree(report_dir, ignore_errors=True)
             try:
                 test_file.unlink()
             except Exception as e:
@@ -156,59 +318,116 @@ class FastAPITestRunner:
         auth_register_endpoint_prompt: str = "",
         related_endpoints_prompt: str = "",
         python_venv: str = None,
-    ):
+        context_budget: int = DEFAULT_CONTEXT_TOKENS,
+        on_attempt: Optional[Callable[[str, TestReport], None]] = None,
+    ) -> Tuple[Optional[str], str]:
+        """
+        Runs the test code and lets the model fix it until it passes. Returns the final code and how the loop ended:
+        FIX_PASSED, FIX_COMMENTED_OUT (the user gave up and the code is commented out) or FIX_FAILED (no code).
+        """
         attempt = 0
         current_test_code = test_code
+        # Test units that failed before the last per-function repair; only they are re-run, including any the
+        # reply left out, so a partial repair can't look like a green run.
+        repaired_units = None
 
         while attempt < max_attempts:
             rich_console.info_string(f"Attempt {attempt + 1}/{max_attempts}")
             
-            test_run_output, execution_success = FastAPITestRunner.run_tests_safely(test_code=current_test_code, project_path=project_path, python_venv=python_venv)
-            if execution_success and not any(keyword in test_run_output for keyword in [
-                    "FAILED", "ERROR", "assert", "AssertionError",
-                    "ERROR at setup", "fixture", "ModuleNotFoundError", "ImportError", "TypeError", "NameError", "SyntaxError"
-                ]):
-                rich_console.success_string("All tests passed successfully!")
-                return current_test_code
+            test_run_output, test_report = FastAPITestRunner.run_tests_safely(test_code=current_test_code, project_path=project_path, python_venv=python_venv, tests=repaired_units)
+            if on_attempt is not None:
+                on_attempt(current_test_code, test_report)
+            if test_report.passed:
+                rich_console.success_string(f"All tests passed successfully! ({test_report.summary_string()})")
+                return current_test_code, FIX_PASSED
             
-            rich_console.warning_string(f"Tests had issues in attempt {attempt + 1}:")
-            error_lines = [line for line in test_run_output.splitlines() if any(kw in line for kw in ["FAILED", "ERROR", "assert", "AssertionError"])]
-            for line in error_lines[:5]:
-                rich_console.error_string(f" {line}")
+            rich_console.warning_string(f"Tests had issues in attempt {attempt + 1}: {test_report.summary_string()}")
+            for case in test_report.failures[:5]:
+                rich_console.error_string(f" {case.outcome.upper()} {case.node_id}: {case.message}")
             
             if attempt + 1 >= max_attempts:
-                user_input = input("⚠️  Maximum attempts reached. Do you want to continue? (y/n): ").strip().lower()
+                user_input = FastAPITestRunner.ask_to_continue("⚠️  Maximum attempts reached. Do you want to continue? (y/n): ")
                 if user_input == "y":
                     max_attempts += 10
                 elif user_input == "n":
                     rich_console.error_string(" Stopping the fixing process without saving failed test.")
-                    return FileFunctions.comment_out_code(current_test_code)
+                    return FileFunctions.comment_out_code(current_test_code), FIX_COMMENTED_OUT
                 else:
                     rich_console.warning_string("❓ Please enter 'y' or 'n'.")
                     continue
-            
+
+            attempt += 1
+            repaired_units = None
+            layout = TestFileLayout.parse(current_test_code)
+            failing_units = FastAPITestRunner.repairable_units(layout, test_report)
+            if failing_units:
+                rich_console.info_string(f"🔧 Repairing only: {', '.join(failing_units)}")
+                prompt = (
+                    ContextAssembler(budget_tokens=context_budget)
+                    .add(FastApiPrompts.pytest_function_repair_prompt, priority=None, deduplicate=False)
+                    .add("\n\n".join(layout.unit_source(name) for name in failing_units), title="- Failing test functions : ", priority=None, deduplicate=False)
+                    .add(test_report.failure_details(), title="- Failing tests : ", priority=None, truncate="head", deduplicate=False)
+                    .add(layout.shared_source(), title="- Shared imports, fixtures and helpers (read only) : ", priority=None, truncate="head", deduplicate=False)
+                    .add(test_scenario, title="- Test Scenario : ", priority=4, truncate="head", deduplicate=False)
+                    .add(parsed_openapi_endpoint_data, title="- OpenAPI data of the project : ", priority=3, truncate="head")
+                    .add(auth_token_endpoint_prompt or "Not provided", title="- Auth token endpoint : ", priority=2, deduplicate=bool(auth_token_endpoint_prompt))
+                    .add(auth_register_endpoint_prompt or "Not provided", title="- Auth register endpoint : ", priority=2, deduplicate=bool(auth_register_endpoint_prompt))
+                    .add(related_endpoints_prompt, priority=1, truncate="head")
+                    .build()
+                )
+                repaired = TestFileLayout.extract_units(OpenRouter.send_request_to_openrouter(
+                    api_key=api_key,
+                    model_name=model_name,
+                    prompt=prompt,
+                    stop_when=code_block_complete,
+                ))
+                repaired = {name: source for name, source in repaired.items() if name in failing_units}
+                if repaired:
+                    current_test_code = layout.splice(repaired)
+                    repaired_units = list(failing_units)
+                    continue
+                rich_console.warning_string("⚠️ No usable test functions in the repair, fixing the whole file instead")
+
             prompt = (
-                FastApiPrompts.pytest_error_prompt + "\n\n"
-                + "- OpenAPI data of the project : " + "\n" + parsed_openapi_endpoint_data + "\n\n"
-                + "- Current test code : " + "\n" + current_test_code + "\n\n"
-                + "- Error output : " + "\n" + test_run_output + "\n\n"
-                + "- Test Scenario : " + "\n" + test_scenario + "\n\n"
-                + "- Tree Structure : " + "\n" + tree_struct + "\n"
-                + "- Auth token endpoint : " + "\n" + auth_token_endpoint_prompt + "\n" 
-                + "- Auth register endpoint : " + "\n" + auth_register_endpoint_prompt + "\n"
-                + related_endpoints_prompt
+                ContextAssembler(budget_tokens=context_budget)
+                .add(FastApiPrompts.pytest_error_prompt, priority=None, deduplicate=False)
+                .add(parsed_openapi_endpoint_data, title="- OpenAPI data of the project : ", priority=None, truncate="head")
+                .add(current_test_code, title="- Current test code : ", priority=None, deduplicate=False)
+                .add(test_report.failure_details(), title="- Failing tests : ", priority=5, truncate="head", deduplicate=False)
+                .add(test_run_output, title="- Error output : ", priority=4, truncate="middle", deduplicate=False)
+                .add(test_scenario, title="- Test Scenario : ", priority=None, truncate="head", deduplicate=False)
+                .add(tree_struct, title="- Tree Structure : ", priority=2, truncate="head")
+                .add(auth_token_endpoint_prompt or "Not provided", title="- Auth token endpoint : ", priority=3, deduplicate=bool(auth_token_endpoint_prompt))
+                .add(auth_register_endpoint_prompt or "Not provided", title="- Auth register endpoint : ", priority=3, deduplicate=bool(auth_register_endpoint_prompt))
+                .add(related_endpoints_prompt, priority=1, truncate="head")
+                .build()
             )
 
             fixed_code = OpenRouter.send_request_to_openrouter(
                 api_key=api_key,
                 model_name=model_name,
-                prompt=prompt
+                prompt=prompt,
+                stop_when=code_block_complete,
             )
 
             current_test_code = fixed_code
-            attempt += 1
         
-        return None
+        return None, FIX_FAILED
+
+    @staticmethod
+    def repairable_units(layout: Optional[TestFileLayout], test_report: TestReport) -> List[str]:
+        """
+        Test units that can be repaired one by one: every problem is an assertion-style failure inside a test unit
+        and at least one unit still passes. Collection and setup errors, or a fully red module, need a whole-file fix.
+        """
+        if layout is None or test_report.problem or not test_report.failures:
+            return []
+        if any(case.outcome != OUTCOME_FAILED for case in test_report.failures):
+            return []
+        failing_units = layout.failing_units([case.node_id for case in test_report.failures])
+        if len(failing_units) >= len(layout.units):
+            return []
+        return failing_units
     
     @staticmethod
     def finalize_combined_test_file(
@@ -218,57 +437,62 @@ class FastAPITestRunner:
         test_code: str,
         max_attempts: int = 10,
         python_venv: str = None,
-    ):
-        
+        context_budget: int = DEFAULT_CONTEXT_TOKENS,
+        workers: int = 1,
+    ) -> Tuple[Optional[str], str]:
+        """
+        Runs the combined test file and lets the model fix it until it passes. Returns the final code and how the loop
+        ended, like attempt_test_fix_loop.
+        """
         attempt = 0
         current_test_code = test_code
 
         while attempt < max_attempts:
             rich_console.info_string(f"[Final Fix Loop] Attempt {attempt + 1}/{max_attempts}")
 
-            test_output, execution_success = FastAPITestRunner.run_tests_safely(
+            test_output, test_report = FastAPITestRunner.run_tests_safely(
                 test_code=current_test_code,
                 project_path=project_path,
-                python_venv=python_venv
+                python_venv=python_venv,
+                workers=workers,
             )
 
-            if execution_success and not any(keyword in test_output for keyword in [
-                "FAILED", "ERROR", "assert", "AssertionError",
-                "ERROR at setup", "fixture", "ModuleNotFoundError",
-                "ImportError", "TypeError", "NameError", "SyntaxError"
-            ]):
-                rich_console.success_string("✅ Final combined test file passed!")
-                return current_test_code
+            if test_report.passed:
+                rich_console.success_string(f"✅ Final combined test file passed! ({test_report.summary_string()})")
+                return current_test_code, FIX_PASSED
 
-            rich_console.warning_string(f"[Final Fix Loop] Detected issues in attempt {attempt + 1}:")
-            for line in test_output.splitlines():
-                if any(kw in line for kw in ["FAILED", "ERROR", "assert", "AssertionError"]):
-                    rich_console.error_string(f" {line}")
+            rich_console.warning_string(f"[Final Fix Loop] Detected issues in attempt {attempt + 1}: {test_report.summary_string()}")
+            for case in test_report.failures:
+                rich_console.error_string(f" {case.outcome.upper()} {case.node_id}: {case.message}")
 
             if attempt + 1 >= max_attempts:
-                user_input = input("⚠️  Maximum attempts reached in final fix loop. Continue? (y/n): ").strip().lower()
+                user_input = FastAPITestRunner.ask_to_continue("⚠️  Maximum attempts reached in final fix loop. Continue? (y/n): ")
                 if user_input == "y":
                     max_attempts += 10
                 elif user_input == "n":
                     rich_console.error_string("Stopping final fix without saving.")
-                    return FileFunctions.comment_out_code(current_test_code)
+                    return FileFunctions.comment_out_code(current_test_code), FIX_COMMENTED_OUT
                 else:
                     rich_console.warning_string("❓ Please enter 'y' or 'n'.")
                     continue
 
             prompt = (
-                FastApiPrompts.finalize_test_file_prompt + "\n\n"
-                "- Current test code : " + "\n" + current_test_code + "\n\n"
-                "- Test output : " + "\n" + test_output + "\n\n"
+                ContextAssembler(budget_tokens=context_budget)
+                .add(FastApiPrompts.finalize_test_file_prompt, priority=None, deduplicate=False)
+                .add(current_test_code, title="- Current test code : ", priority=None, deduplicate=False)
+                .add(test_report.failure_details(), title="- Failing tests : ", priority=2, truncate="head", deduplicate=False)
+                .add(test_output, title="- Test output : ", priority=1, truncate="middle", deduplicate=False)
+                .build()
             )
 
             fixed_code = OpenRouter.send_request_to_openrouter(
                 api_key=api_key,
                 model_name=model_name,
-                prompt=prompt
+                prompt=prompt,
+                stop_when=code_block_complete,
             )
 
             current_test_code = fixed_code
             attempt += 1
 
-        return None
\ No newline at end of file
+        return None, FIX_FAILED
\ No newline at end of file
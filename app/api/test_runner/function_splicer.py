@@ -0,0 +1,97 @@
+import ast
+import re
+from typing import Dict, List, Optional
+
+CODE_FENCE_PATTERN = re.compile(r"```(?:python|py)?\s*\n(.*?)```", re.DOTALL)
+
+class TestFileLayout:
+    """
+    Splits a generated test module with `ast` into its test units (top-level `test_*` functions and `Test*` classes)
+    and the shared code around them (imports, fixtures, helpers), so single units can be repaired and spliced back.
+    """
+    __test__ = False
+
+    def __init__(self, code: str):
+        self.code = code
+        self.lines = code.splitlines(keepends=True)
+        self.units: Dict[str, ast.stmt] = {}
+        for node in ast.parse(code).body:
+            if TestFileLayout.is_test_unit(node):
+                self.units[node.name] = node
+
+    @staticmethod
+    def parse(code: str) -> Optional["TestFileLayout"]:
+        try:
+            return TestFileLayout(code)
+        except SyntaxError:
+            return None
+
+    @staticmethod
+    def is_test_unit(node: ast.stmt) -> bool:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            return node.name.startswith("test")
+        return isinstance(node, ast.ClassDef) and node.name.startswith("Test")
+
+    @staticmethod
+    def unit_name(node_id: str) -> str:
+        """
+        Top-level unit of a pytest node id: "TestUsers::test_create" -> "TestUsers", "test_get[2]" -> "test_get".
+        """
+        return node_id.split("::")[0].split("[")[0]
+
+    def span(self, name: str) -> tuple[int, int]:
+        node = self.units[name]
+        start = min([node.lineno, *(decorator.lineno for decorator in node.decorator_list)])
+        return start - 1, node.end_lineno
+
+    def unit_source(self, name: str) -> str:
+        start, end = self.span(name)
+        return "".join(self.lines[start:end])
+
+    def shared_source(self) -> str:
+        """
+        The module without its test units: imports, fixtures, helpers and constants.
+        """
+        removed = set()
+        for name in self.units:
+            removed.update(range(*self.span(name)))
+        return "".join(line for index, line in enumerate(self.lines) if index not in removed)
+
+    def splice(self, replacements: Dict[str, str]) -> str:
+        """
+        Returns the module with the given units replaced; everything else is kept byte for byte.
+        """
+        lines = list(self.lines)
+        for name in sorted((name for name in replacements if name in self.units), key=lambda name: self.span(name)[0], reverse=True):
+            start, end = self.span(name)
+            source = replacements[name].rstrip("\n") + "\n"
+            lines[start:end] = source.splitlines(keepends=True)
+        return "".join(lines)
+
+    @staticmethod
+    def extract_units(reply: str) -> Dict[str, str]:
+        """
+        Test units found in an LLM reply, which may or may not be wrapped in a code fence.
+        """
+        blocks = CODE_FENCE_PATTERN.findall(reply) or [reply]
+        units: Dict[str, str] = {}
+        for block in blocks:
+            layout = TestFileLayout.parse(block)
+            if layout is None:
+                continue
+            for name in layout.units:
+                units[name] = layout.unit_source(name)
+        return units
+
+    def failing_units(self, node_ids: List[str]) -> List[str]:
+        """
+        Units the failing node ids belong to, or an empty list if any of them is not a unit of this module.
+        """
+        names = []
+        for node_id in node_ids:
+            name = TestFileLayout.unit_name(node_id)
+            if name not in self.units:
+                return []
+            if name not in names:
+                names.append(name)
+        return names
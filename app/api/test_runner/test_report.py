@@ -0,0 +1,124 @@
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+OUTCOME_PASSED = "passed"
+OUTCOME_FAILED = "failed"
+OUTCOME_ERROR = "error"
+OUTCOME_SKIPPED = "skipped"
+# pytest's exit code when it collected no tests.
+PYTEST_NO_TESTS_COLLECTED = 5
+
+class TestCaseResult:
+    """
+    Outcome of one test, as reported in pytest's junit xml.
+    """
+    __test__ = False
+
+    def __init__(self, name: str, classname: str = "", outcome: str = OUTCOME_PASSED, duration: float = 0.0, message: str = "", traceback: str = ""):
+        self.name = name
+        self.classname = classname
+        self.outcome = outcome
+        self.duration = duration
+        self.message = message
+        self.traceback = traceback
+
+    @property
+    def node_id(self) -> str:
+        # junit classnames look like "test_runner_ab12cd34.TestUsers"; drop the module part.
+        scope = self.classname.split(".", 1)[1] if "." in self.classname else ""
+        return f"{scope}::{self.name}" if scope else self.name
+
+    def trimmed_traceback(self, max_lines: int = 15) -> str:
+        lines = self.traceback.strip().splitlines()
+        if len(lines) <= max_lines:
+            return "\n".join(lines)
+        return "\n".join(["...", *lines[-max_lines:]])
+
+class TestReport:
+    """
+    Structured result of a pytest run. `passed` is true when pytest exited cleanly without failures or errors, even
+    if every test was skipped, so words like "assert" in passing output no longer count as problems. A run that
+    collected nothing passes only when the code has no tests to collect (`expects_tests` is false).
+    """
+    __test__ = False
+
+    def __init__(self, cases: Optional[List[TestCaseResult]] = None, returncode: int = 0, problem: str = "", expects_tests: bool = True):
+        self.cases = cases or []
+        self.returncode = returncode
+        self.problem = problem
+        self.expects_tests = expects_tests
+
+    @staticmethod
+    def from_junit_xml(path: str, returncode: int) -> "TestReport":
+        report_path = Path(path)
+        if not report_path.exists():
+            return TestReport(returncode=returncode, problem="pytest did not write a report (it crashed or was interrupted)")
+        try:
+            root = ET.parse(report_path).getroot()
+        except ET.ParseError as e:
+            return TestReport(returncode=returncode, problem=f"Unreadable pytest report: {e}")
+
+        cases = []
+        for testcase in root.iter("testcase"):
+            case = TestCaseResult(
+                name=testcase.get("name", ""),
+                classname=testcase.get("classname", ""),
+                duration=float(testcase.get("time") or 0),
+            )
+            for tag, outcome in (("failure", OUTCOME_FAILED), ("error", OUTCOME_ERROR), ("skipped", OUTCOME_SKIPPED)):
+                element = testcase.find(tag)
+                if element is not None:
+                    case.outcome = outcome
+                    case.message = element.get("message", "")
+                    case.traceback = element.text or ""
+                    break
+            cases.append(case)
+        return TestReport(cases=cases, returncode=returncode)
+
+    @staticmethod
+    def merge(reports: Iterable["TestReport"]) -> "TestReport":
+        merged = TestReport()
+        for report in reports:
+            merged.cases.extend(report.cases)
+            merged.returncode = merged.returncode or report.returncode
+            merged.problem = "\n".join(filter(None, [merged.problem, report.problem]))
+        return merged
+
+    def count(self, outcome: str) -> int:
+        return sum(1 for case in self.cases if case.outcome == outcome)
+
+    @property
+    def failures(self) -> List[TestCaseResult]:
+        return [case for case in self.cases if case.outcome in (OUTCOME_FAILED, OUTCOME_ERROR)]
+
+    @property
+    def passed(self) -> bool:
+        if self.problem or self.failures:
+            return False
+        if self.returncode == PYTEST_NO_TESTS_COLLECTED:
+            return not self.expects_tests
+        return self.returncode == 0
+
+    @property
+    def duration(self) -> float:
+        return sum(case.duration for case in self.cases)
+
+    def summary_string(self) -> str:
+        return (
+            f"{self.count(OUTCOME_PASSED)} passed, {self.count(OUTCOME_FAILED)} failed, {self.count(OUTCOME_ERROR)} errors, "
+            f"{self.count(OUTCOME_SKIPPED)} skipped in {self.duration:.2f}s"
+        )
+
+    def failure_details(self, max_traceback_lines: int = 15) -> str:
+        """
+        Failing tests with their message and the tail of their traceback, for the fix prompts.
+        """
+        sections = [self.summary_string()]
+        if self.problem:
+            sections.append(self.problem)
+        elif not self.cases:
+            sections.append(f"No tests were collected (pytest exit code {self.returncode})")
+        for case in self.failures:
+            sections.append(f"{case.outcome.upper()} {case.node_id} ({case.duration:.2f}s): {case.message}\n{case.trimmed_traceback(max_traceback_lines)}")
+        return "\n\n".join(sections)
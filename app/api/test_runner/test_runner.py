@@ -1,5 +1,8 @@
-from .fastapi import FastAPITestRunner
+from .fastapi import FIX_COMMENTED_OUT, FIX_FAILED, FIX_PASSED, FastAPITestRunner
 
 __all__ = [
     "FastAPITestRunner",
+    "FIX_PASSED",
+    "FIX_COMMENTED_OUT",
+    "FIX_FAILED",
 ]
\ No newline at end of file
@@ -0,0 +1,187 @@
+import json
+import subprocess
+from importlib.util import find_spec
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+from config.rich_console import rich_console
+
+# Import names whose pip distribution is named differently.
+PIP_NAME_ALIASES = {
+    "jose": "python-jose",
+    "jwt": "PyJWT",
+    "yaml": "PyYAML",
+    "dotenv": "python-dotenv",
+    "multipart": "python-multipart",
+    "dateutil": "python-dateutil",
+    "PIL": "Pillow",
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "sklearn": "scikit-learn",
+    "jinja2": "Jinja2",
+    "psycopg2": "psycopg2-binary",
+    "MySQLdb": "mysqlclient",
+    "magic": "python-magic",
+    "faker": "Faker",
+}
+
+# Runs inside the target interpreter; prints its stdlib and importable top-level module names as JSON.
+VENV_PROBE_SCRIPT = """
+import json, pkgutil, sys, sysconfig
+stdlib = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+if not getattr(sys, "stdlib_module_names", None):
+    stdlib |= {module.name for module in pkgutil.iter_modules([sysconfig.get_paths()["stdlib"]])}
+modules = {module.name for module in pkgutil.iter_modules()}
+try:
+    from importlib.metadata import packages_distributions
+    modules |= set(packages_distributions())
+except ImportError:
+    pass
+print(json.dumps({"stdlib": sorted(stdlib), "modules": sorted(modules - stdlib)}))
+"""
+
+class VenvPackageIndex:
+    """
+    Importable modules of a target interpreter, probed once per run. Answers which of a test's imports still need
+    a pip install, skipping stdlib and project-local modules, and remembers what has been installed or failed.
+    """
+    _indexes: Dict[str, "VenvPackageIndex"] = {}
+    _indexes_lock = threading.Lock()
+
+    def __init__(self, python_exec: str):
+        self.python_exec = str(python_exec)
+        self.stdlib: Set[str] = set()
+        self.modules: Set[str] = set()
+        self.unavailable: Set[str] = set()
+        self.probed = False
+        self._local_modules: Dict[str, Set[str]] = {}
+        self.lock = threading.RLock()
+        self.probe()
+
+    @staticmethod
+    def for_interpreter(python_exec: str) -> "VenvPackageIndex":
+        """
+        Cached index of `python_exec`. An index whose probe failed is returned but not cached, so the next call probes
+        again instead of treating every import as missing for the rest of the run.
+        """
+        with VenvPackageIndex._indexes_lock:
+            index = VenvPackageIndex._indexes.get(str(python_exec))
+            if index is None:
+                index = VenvPackageIndex(python_exec)
+                if index.probed:
+                    VenvPackageIndex._indexes[str(python_exec)] = index
+            return index
+
+    @staticmethod
+    def forget(python_exec: str) -> None:
+        """
+        Drops the index of an interpreter whose packages changed outside of `install`.
+        """
+        with VenvPackageIndex._indexes_lock:
+            VenvPackageIndex._indexes.pop(str(python_exec), None)
+
+    def probe(self) -> None:
+        try:
+            result = subprocess.run(
+                [self.python_exec, "-c", VENV_PROBE_SCRIPT],
+                check=True,
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            probed = json.loads(result.stdout)
+        except (subprocess.SubprocessError, OSError, json.JSONDecodeError) as e:
+            rich_console.warning_string(f"⚠️ Could not list the packages of {self.python_exec}: {e}")
+            return
+        self.stdlib = set(probed["stdlib"])
+        self.modules = set(probed["modules"])
+        self.probed = True
+
+    def local_modules(self, project_path: Optional[str]) -> Set[str]:
+        """
+        Top-level modules and packages of the project itself.
+        """
+        if not project_path:
+            return set()
+        if project_path not in self._local_modules:
+            names = set()
+            for entry in Path(project_path).iterdir():
+                if entry.is_dir() and not entry.name.startswith("."):
+                    names.add(entry.name)
+                elif entry.suffix == ".py":
+                    names.add(entry.stem)
+            self._local_modules[project_path] = names
+        return self._local_modules[project_path]
+
+    @staticmethod
+    def pip_name(module: str) -> str:
+        return PIP_NAME_ALIASES.get(module, module)
+
+    def missing_modules(self, modules: Iterable[str], project_path: Optional[str] = None) -> List[str]:
+        local = self.local_modules(project_path)
+        with self.lock:
+            if not self.probed:
+                # Without a package list, check each import the way it was done before the index existed.
+                return sorted(module for module in set(modules) if module not in local and not find_spec(module))
+            return sorted(
+                module for module in set(modules)
+                if module not in self.stdlib and module not in self.modules and module not in local
+            )
+
+    def pip_install(self, packages: List[str], timeout: int) -> None:
+        subprocess.run(
+            [
+                self.python_exec, "-m", "pip", "install",
+                "--disable-pip-version-check",
+                "--no-warn-script-location",
+                *packages
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout
+        )
+
+    def install(self, modules: List[str], timeout: int = 60) -> bool:
+        """
+        Installs the pip distributions of `modules` with one pip call. When that call fails each distribution is
+        retried on its own, and only the modules whose own install fails are remembered as unavailable, so a
+        hallucinated import doesn't cost a pip run on every fix attempt nor block the real dependencies next to it.
+        """
+        with self.lock:
+            if any(module in self.unavailable for module in modules):
+                return False
+            packages = sorted({VenvPackageIndex.pip_name(module) for module in modules})
+            rich_console.info_string(f"🔍 Missing packages detected: {', '.join(packages)}")
+            try:
+                self.pip_install(packages, timeout)
+            except subprocess.CalledProcessError as e:
+                rich_console.error_string(f"❌ Failed to install packages. Error output:\n {e.output}")
+                return self.install_one_by_one(modules, timeout)
+            except subprocess.TimeoutExpired:
+                rich_console.warning_string(f"⏰ Package installation timed out after {timeout} seconds")
+                return False
+            rich_console.success_string("✅ Successfully installed packages")
+            self.modules.update(modules)
+            return True
+
+    def install_one_by_one(self, modules: List[str], timeout: int) -> bool:
+        failed = []
+        for module in sorted(set(modules)):
+            try:
+                self.pip_install([VenvPackageIndex.pip_name(module)], timeout)
+            except subprocess.CalledProcessError:
+                self.unavailable.add(module)
+                failed.append(module)
+                continue
+            except subprocess.TimeoutExpired:
+                rich_console.warning_string(f"⏰ Installing {VenvPackageIndex.pip_name(module)} timed out after {timeout} seconds")
+                failed.append(module)
+                continue
+            self.modules.add(module)
+        if failed:
+            rich_console.error_string(f"❌ Could not install: {', '.join(VenvPackageIndex.pip_name(module) for module in failed)}")
+            return False
+        rich_console.success_string("✅ Successfully installed packages")
+        return True
@@ -0,0 +1,177 @@
+import json
+import queue
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from config.rich_console import rich_console
+
+WORKER_SCRIPT = Path(__file__).with_name("worker_main.py")
+
+class WarmTestWorker:
+    """
+    Long-lived pytest process running in the target interpreter. The project and pytest are imported once;
+    each test module is then run in-process with its own module namespace. The process is restarted after
+    `max_runs` runs, after a crash and after a timeout.
+    """
+    def __init__(self, python_exec: str, project_path: str, preload_modules: Optional[List[str]] = None, max_runs: int = 50, timeout: float = 300.0):
+        self.python_exec = str(python_exec)
+        self.project_path = str(Path(project_path).resolve())
+        self.preload_modules = preload_modules or []
+        self.max_runs = max_runs
+        self.timeout = timeout
+        self.runs = 0
+        self.process: Optional[subprocess.Popen] = None
+        self.responses: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._request_id = 0
+
+    def start(self) -> None:
+        self.process = subprocess.Popen(
+            [self.python_exec, str(WORKER_SCRIPT), self.project_path, ",".join(self.preload_modules)],
+            cwd=self.project_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self.responses = queue.Queue()
+        threading.Thread(target=self.read_responses, args=(self.process, self.responses), daemon=True).start()
+        self.runs = 0
+        ready = self.wait_for_response(timeout=self.timeout)
+        if not ready or not ready.get("ready"):
+            self.stop()
+            raise RuntimeError("Warm test worker failed to start")
+        if ready.get("failed"):
+            rich_console.warning_string(f"Warm test worker could not preload: {', '.join(ready['failed'])}")
+
+    @staticmethod
+    def read_responses(process: subprocess.Popen, responses: "queue.Queue[Optional[dict]]") -> None:
+        for line in process.stdout:
+            try:
+                responses.put(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        responses.put(None)
+
+    def wait_for_response(self, timeout: float) -> Optional[dict]:
+        try:
+            return self.responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def kill(self) -> None:
+        """
+        Kills the process of a worker that another thread is using; that thread sees a crash and stops the worker.
+        """
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, test_file: str, pytest_args: List[str]) -> Tuple[str, int]:
+        """
+        Runs pytest on `test_file` (relative to the project) and returns (output, returncode).
+        """
+        if not self.is_alive() or self.runs >= self.max_runs:
+            self.stop()
+            self.start()
+        self._request_id += 1
+        request = {"id": self._request_id, "test_file": test_file, "args": pytest_args}
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            self.stop()
+            return "🔥 Warm test worker crashed before running the tests", 3
+        self.runs += 1
+        response = self.wait_for_response(timeout=self.timeout)
+        if response is None:
+            timed_out = self.is_alive()
+            if timed_out:
+                self.process.kill()
+            self.stop()
+            reason = f"timed out after {self.timeout:.0f}s" if timed_out else "crashed while running the tests"
+            return f"🔥 Warm test worker {reason}", 3
+        return response["output"], response["returncode"]
+
+class WarmWorkerPool:
+    """
+    Warm workers per (interpreter, project), grown on demand up to `size` so parallel fix loops don't queue behind one process.
+    """
+    def __init__(self, size: int = 1, max_runs: int = 50, timeout: float = 300.0):
+        self.size = max(1, size)
+        self.max_runs = max_runs
+        self.timeout = timeout
+        self._idle: Dict[tuple, List[WarmTestWorker]] = {}
+        self._counts: Dict[tuple, int] = {}
+        self._busy: Set[WarmTestWorker] = set()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, python_exec: str, project_path: str, preload_modules: List[str]) -> WarmTestWorker:
+        key = (str(python_exec), str(Path(project_path).resolve()))
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Warm test worker pool is closed")
+                idle = self._idle.setdefault(key, [])
+                if idle:
+                    worker = idle.pop()
+                elif self._counts.get(key, 0) < self.size:
+                    self._counts[key] = self._counts.get(key, 0) + 1
+                    worker = WarmTestWorker(python_exec, project_path, preload_modules, max_runs=self.max_runs, timeout=self.timeout)
+                else:
+                    self._condition.wait()
+                    continue
+                self._busy.add(worker)
+                return worker
+
+    def release(self, worker: WarmTestWorker) -> None:
+        key = (worker.python_exec, worker.project_path)
+        with self._condition:
+            self._busy.discard(worker)
+            if self._closed:
+                worker.stop()
+                return
+            self._idle.setdefault(key, []).append(worker)
+            self._condition.notify()
+
+    def run(self, python_exec: str, project_path: str, test_file: str, pytest_args: List[str], preload_modules: Optional[List[str]] = None) -> Tuple[str, int]:
+        worker = self.acquire(python_exec, project_path, preload_modules or [])
+        try:
+            return worker.run(test_file, pytest_args)
+        finally:
+            self.release(worker)
+
+    def close(self) -> None:
+        """
+        Stops the idle workers and kills the busy ones; their runs end as crashes and the workers are stopped on release.
+        """
+        with self._condition:
+            self._closed = True
+            for workers in self._idle.values():
+                for worker in workers:
+                    worker.stop()
+            for worker in self._busy:
+                worker.kill()
+            self._idle.clear()
+            self._counts.clear()
+            self._condition.notify_all()
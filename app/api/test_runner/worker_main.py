@@ -0,0 +1,78 @@
+"""
+Warm test worker, started by WarmTestWorker inside the target project's interpreter.
+
+Only depends on the standard library and pytest. It imports the project once, then reads one JSON request per
+line from stdin ({"id", "test_file", "args"}) and answers with one JSON line ({"id", "returncode", "output"}).
+Test output is captured at the file-descriptor level so it never mixes with the protocol stream.
+"""
+import importlib
+import json
+import os
+import sys
+import tempfile
+import traceback
+
+def preload(modules):
+    loaded, failed = [], {}
+    for module in modules:
+        try:
+            importlib.import_module(module)
+            loaded.append(module)
+        except BaseException as e:
+            failed[module] = f"{type(e).__name__}: {e}"
+    return loaded, failed
+
+def forget_test_module(test_file):
+    test_file = os.path.abspath(test_file.split("::")[0])
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and os.path.abspath(module_file) == test_file:
+            del sys.modules[name]
+
+def run_pytest(test_file, args):
+    import pytest
+
+    with tempfile.TemporaryFile(mode="w+b") as capture:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+        os.dup2(capture.fileno(), 1)
+        os.dup2(capture.fileno(), 2)
+        try:
+            returncode = int(pytest.main([test_file, *args]))
+        except BaseException:
+            traceback.print_exc()
+            returncode = 3
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_stdout, 1)
+            os.dup2(saved_stderr, 2)
+            os.close(saved_stdout)
+            os.close(saved_stderr)
+            forget_test_module(test_file)
+        capture.seek(0)
+        output = capture.read().decode("utf-8", errors="replace")
+    return returncode, output
+
+def main():
+    project_path = sys.argv[1]
+    modules = [module for module in sys.argv[2].split(",") if module] if len(sys.argv) > 2 else []
+    os.chdir(project_path)
+    sys.path.insert(0, project_path)
+
+    # Everything printed from here on belongs to the tests; the protocol uses a private copy of stdout.
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    loaded, failed = preload(["pytest", *modules])
+    protocol.write(json.dumps({"ready": True, "loaded": loaded, "failed": failed}) + "\n")
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        returncode, output = run_pytest(request["test_file"], request.get("args", []))
+        protocol.write(json.dumps({"id": request.get("id"), "returncode": returncode, "output": output}) + "\n")
+
+if __name__ == "__main__":
+    main()
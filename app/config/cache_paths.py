@@ -0,0 +1,14 @@
+import os
+from pathlib import Path
+
+def get_cache_dir(*parts: str) -> Path:
+    """
+    Returns (and creates) a directory under the testpilotai cache root.
+    The root is $TESTPILOTAI_CACHE_DIR, or $XDG_CACHE_HOME/testpilotai, or ~/.cache/testpilotai.
+    """
+    base = os.environ.get("TESTPILOTAI_CACHE_DIR")
+    if not base:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "testpilotai"
+    path = Path(base, *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
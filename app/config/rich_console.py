@@ -3,6 +3,7 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 from rich.rule import Rule
+from rich.table import Table
 from contextlib import contextmanager
 
 console = Console()
@@ -55,6 +56,14 @@ class RichPrinter:
     def print_test_appended_path(self,path: str):
         console.print(f"✅ [bold green]Test code appended to[/bold green] [italic]{path}[/italic]")
 
+    def summary_table(self,title: str, rows: list) -> None:
+        table = Table(title=title, title_style="bold cyan")
+        for column in (rows[0].keys() if rows else []):
+            table.add_column(column.replace("_", " "))
+        for row in rows:
+            table.add_row(*(str(value) for value in row.values()))
+        console.print(table)
+
     def section_divider(self,title: str = "") -> None:
         if title:
             console.print(Rule(f"[bold green]{title}[/bold green]"))
@@ -0,0 +1,90 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_ATTEMPTS = 10
+# Same keyring service and entry names as api_key_utils.
+KEYRING_SERVICE = "openrouter"
+
+# Setting name -> environment variables, first one set wins.
+ENV_VARS = {
+    "api_key": ("TESTPILOTAI_API_KEY", "OPENROUTER_API_KEY"),
+    "max_attempts": ("TESTPILOTAI_MAX_ATTEMPTS",),
+    "default_model": ("TESTPILOTAI_DEFAULT_MODEL",),
+    "base_url": ("TESTPILOTAI_BASE_URL", "OPENROUTER_BASE_URL"),
+}
+# Not secrets, so never looked up in the keyring.
+NOT_IN_KEYRING = {"base_url"}
+
+def default_config_path() -> Path:
+    base = os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config"
+    return Path(os.environ.get("TESTPILOTAI_CONFIG") or Path(base) / "testpilotai" / "config.json")
+
+class Settings:
+    """
+    Process-wide settings, resolved once from environment variables, then the JSON config file
+    ($TESTPILOTAI_CONFIG or ~/.config/testpilotai/config.json), then the keyring. The keyring is only asked for
+    values the first two don't provide, and can be skipped entirely with TESTPILOTAI_NO_KEYRING=1.
+    `base_url` points the tool at another OpenRouter-compatible endpoint, e.g. `testpilotai fake-openrouter`.
+    """
+    def __init__(self, api_key: Optional[str] = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS, default_model: Optional[str] = None, base_url: Optional[str] = None, sources: Optional[Dict[str, str]] = None):
+        self.api_key = api_key
+        self.max_attempts = max_attempts
+        self.default_model = default_model
+        self.base_url = base_url
+        self.sources = sources or {}
+
+    @staticmethod
+    def read_config_file(path: Path) -> Dict[str, Any]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Cannot read config file {path}: {e}")
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def read_keyring(name: str) -> Optional[str]:
+        try:
+            import keyring
+            return keyring.get_password(KEYRING_SERVICE, name)
+        except Exception:
+            # No backend (headless host, no Secret Service) or a broken one: treat as unset.
+            return None
+
+    @staticmethod
+    def load(config_path: Optional[Path] = None, use_keyring: Optional[bool] = None) -> "Settings":
+        if use_keyring is None:
+            use_keyring = os.environ.get("TESTPILOTAI_NO_KEYRING", "").lower() not in ("1", "true", "yes")
+        config_file = Path(config_path) if config_path else default_config_path()
+        config = Settings.read_config_file(config_file)
+
+        values: Dict[str, Any] = {}
+        sources: Dict[str, str] = {}
+        for name, env_vars in ENV_VARS.items():
+            for env_var in env_vars:
+                if os.environ.get(env_var):
+                    values[name], sources[name] = os.environ[env_var], f"env {env_var}"
+                    break
+            else:
+                if config.get(name) not in (None, ""):
+                    values[name], sources[name] = config[name], f"config {config_file}"
+                elif use_keyring and name not in NOT_IN_KEYRING:
+                    value = Settings.read_keyring(name)
+                    if value:
+                        values[name], sources[name] = value, "keyring"
+
+        try:
+            max_attempts = int(values.get("max_attempts", DEFAULT_MAX_ATTEMPTS))
+        except (TypeError, ValueError):
+            raise ValueError(f"max_attempts must be a number (from {sources.get('max_attempts')})")
+        return Settings(
+            api_key=values.get("api_key"),
+            max_attempts=max_attempts,
+            default_model=values.get("default_model"),
+            base_url=values.get("base_url"),
+            sources=sources,
+        )
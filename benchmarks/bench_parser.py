@@ -0,0 +1,215 @@
+"""
+Parser and prompt-assembly benchmarks on synthetic OpenAPI documents.
+
+For every spec size each benchmark is timed cold (fresh spec object, so the per-spec schema index, renderer and
+dependency graph are built inside the measurement) and warm (same object again, served from those caches), best of
+`--repeat` runs. Peak memory of a cold run is measured in a separate pass with tracemalloc, so tracing doesn't skew
+the timings. Results are written as JSON; `--compare` checks them against an earlier file.
+
+    python benchmarks/bench_parser.py --sizes 10,100,1000,10000 --output bench.json
+    python benchmarks/bench_parser.py --compare bench.json --threshold 0.2
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "app"))
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from api.commands.run import build_related_endpoints, build_test_prompt
+from api.openrouter.openrouter import OpenRouter
+from api.parser.dependency_graph import EndpointDependencyGraph
+from api.parser.endpoint_renderer import HTTP_METHODS, EndpointRenderer
+from api.parser.parser import ParserFunctions
+from api.parser.schema_index import SchemaIndex
+from api.prompts.context_assembler import DEFAULT_CONTEXT_TOKENS
+from synthetic_spec import DEFAULT_REF_DEPTH, DEFAULT_UNION_WIDTH, generate_spec
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_PROMPT_SAMPLES = 200
+DEFAULT_THRESHOLD = 0.2
+# Slowdowns smaller than this are timer noise on the small specs.
+DEFAULT_MIN_DELTA_MS = 1.0
+TREE_STRUCT = "\n".join(["app/", "├── main.py", "├── routers/", *(f"│   ├── resource{index}.py" for index in range(40)), "└── models.py"])
+SCENARIO = "testcase_{path}:\n  - create, read and delete the resource\n  - reject an invalid payload with 422\n  - reject a missing bearer token with 401\n"
+
+def reset_spec_caches() -> None:
+    """
+    Drops the per-spec caches so every cold run builds them again.
+    """
+    SchemaIndex.clear_cache()
+    EndpointRenderer.clear_cache()
+    EndpointDependencyGraph.clear_cache()
+
+def operations(spec: Dict[str, Any]) -> Dict[str, List[tuple]]:
+    paths = list(spec["paths"])
+    step = max(1, len(paths) // DEFAULT_PROMPT_SAMPLES)
+    return {
+        "parse_single_endpoint": [(path,) for path in paths],
+        "get_response_schema": [(name,) for name in spec["components"]["schemas"] if name.endswith("_0") and name.startswith("Item")],
+        "find_auth_endpoint": [()],
+        "parse_endpoint_details": [
+            (path, method, method_data)
+            for path, path_item in spec["paths"].items()
+            for method, method_data in path_item.items()
+            if method in HTTP_METHODS
+        ],
+        "prompt_assembly": [(path,) for path in paths[::step][:DEFAULT_PROMPT_SAMPLES]],
+    }
+
+def assemble_prompt(spec: Dict[str, Any], path: str) -> str:
+    chosen_test = {
+        "endpoint": path,
+        "parsed_info": ParserFunctions.parse_single_endpoint(openapi_data=spec, endpoint_name=path),
+        "test_scenario": SCENARIO.format(path=path),
+        "relative_paths": OpenRouter.get_relative_endpoints(endpoint_path=path, openapi_data=spec, api_key=None, open_router_model=None),
+    }
+    related_endpoints = build_related_endpoints(spec, chosen_test)
+    return build_test_prompt(chosen_test, related_endpoints, TREE_STRUCT, "", "", DEFAULT_CONTEXT_TOKENS)
+
+BENCHMARKS: Dict[str, Callable[..., Any]] = {
+    "parse_single_endpoint": lambda spec, path: ParserFunctions.parse_single_endpoint(openapi_data=spec, endpoint_name=path),
+    "get_response_schema": lambda spec, name: ParserFunctions.get_response_schema(spec, name),
+    "find_auth_endpoint": lambda spec: ParserFunctions.find_auth_endpoint(spec),
+    "parse_endpoint_details": lambda spec, path, method, method_data: ParserFunctions.parse_endpoint_details(spec, path, method, method_data),
+    "prompt_assembly": assemble_prompt,
+}
+
+def run_ops(benchmark: str, spec: Dict[str, Any], ops: List[tuple]) -> float:
+    function = BENCHMARKS[benchmark]
+    start = time.perf_counter()
+    for args in ops:
+        function(spec, *args)
+    return time.perf_counter() - start
+
+def time_benchmark(benchmark: str, spec_text: str, repeat: int) -> Dict[str, Any]:
+    cold, warm = [], []
+    ops = []
+    for _ in range(repeat):
+        reset_spec_caches()
+        spec = json.loads(spec_text)
+        ops = operations(spec)[benchmark]
+        gc.collect()
+        cold.append(run_ops(benchmark, spec, ops))
+        warm.append(run_ops(benchmark, spec, ops))
+    return {"ops": len(ops), "cold_seconds": min(cold), "warm_seconds": min(warm)}
+
+def peak_memory(benchmark: str, spec_text: str) -> int:
+    reset_spec_caches()
+    spec = json.loads(spec_text)
+    ops = operations(spec)[benchmark]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run_ops(benchmark, spec, ops)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_suite(sizes: List[int], benchmarks: List[str], repeat: int, ref_depth: int, union_width: int) -> Dict[str, Any]:
+    results = []
+    for size in sizes:
+        spec_text = json.dumps(generate_spec(size, ref_depth=ref_depth, union_width=union_width))
+        for benchmark in benchmarks:
+            timing = time_benchmark(benchmark, spec_text, repeat)
+            result = {
+                "size": size,
+                "benchmark": benchmark,
+                **timing,
+                "cold_ops_per_second": timing["ops"] / timing["cold_seconds"] if timing["cold_seconds"] else None,
+                "warm_ops_per_second": timing["ops"] / timing["warm_seconds"] if timing["warm_seconds"] else None,
+                "peak_memory_bytes": peak_memory(benchmark, spec_text),
+            }
+            results.append(result)
+            print(
+                f"{size:>6} paths  {benchmark:<24} {result['ops']:>6} ops  "
+                f"cold {result['cold_seconds'] * 1000:9.2f} ms ({result['cold_ops_per_second']:>10.0f}/s)  "
+                f"warm {result['warm_seconds'] * 1000:9.2f} ms ({result['warm_ops_per_second']:>10.0f}/s)  "
+                f"peak {result['peak_memory_bytes'] / 1024 / 1024:7.2f} MiB",
+                flush=True,
+            )
+    reset_spec_caches()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": repeat,
+            "ref_depth": ref_depth,
+            "union_width": union_width,
+        },
+        "results": results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[str]:
+    """
+    Benchmarks whose cold or warm time grew by more than `threshold` (0.2 = 20%) and `min_delta_ms` against the baseline.
+    """
+    baseline_results = {(result["size"], result["benchmark"]): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        previous = baseline_results.get((result["size"], result["benchmark"]))
+        if previous is None:
+            continue
+        for key in ("cold_seconds", "warm_seconds"):
+            if previous[key] and result[key] > previous[key] * (1 + threshold) and (result[key] - previous[key]) * 1000 >= min_delta_ms:
+                regressions.append(
+                    f"{result['benchmark']} ({result['size']} paths) {key.split('_')[0]}: "
+                    f"{previous[key] * 1000:.2f} ms -> {result[key] * 1000:.2f} ms (+{(result[key] / previous[key] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark OpenAPI parsing and prompt assembly on synthetic specs")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma separated path counts (default: 10,100,1000,10000)")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Comma separated benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs is reported (default: 3)")
+    parser.add_argument("--ref-depth", type=int, default=DEFAULT_REF_DEPTH, help=f"Length of the $ref chains (default: {DEFAULT_REF_DEPTH})")
+    parser.add_argument("--union-width", type=int, default=DEFAULT_UNION_WIDTH, help=f"Variants per anyOf union (default: {DEFAULT_UNION_WIDTH})")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results JSON; exit 1 if a benchmark got slower than --threshold allows")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"Allowed slowdown against --compare (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS, help=f"Ignore slowdowns below this many ms (default: {DEFAULT_MIN_DELTA_MS})")
+    args = parser.parse_args()
+
+    benchmarks = [name.strip() for name in args.benchmarks.split(",") if name.strip()]
+    unknown = [name for name in benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)} (choose from {', '.join(BENCHMARKS)})")
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    report = run_suite(sizes, benchmarks, max(1, args.repeat), max(1, args.ref_depth), max(1, args.union_width))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        print(f"Compared with {args.compare} (commit {baseline.get('meta', {}).get('commit', 'unknown')})")
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Synthetic OpenAPI documents for the parser benchmarks.
+
+Every path belongs to a schema family. A family's response schema is reached through a chain of `ref_depth` pure
+$ref aliases that ends in an allOf of a shared base schema and an object whose properties are anyOf / oneOf unions,
+arrays of refs and a nested ref chain. Families are shared by several paths, as resources are in real specs, and the
+only token endpoint is the last path, so `find_auth_endpoint` has to scan the whole document.
+"""
+import random
+from typing import Any, Dict
+
+DEFAULT_REF_DEPTH = 8
+DEFAULT_UNION_WIDTH = 4
+PATHS_PER_FAMILY = 2
+BASE_SCHEMAS = 16
+AUTH_PATH = "/session/issue"
+
+def ref(name: str) -> Dict[str, str]:
+    return {"$ref": f"#/components/schemas/{name}"}
+
+def json_content(schema_name: str) -> Dict[str, Any]:
+    return {"content": {"application/json": {"schema": ref(schema_name)}}}
+
+def union_variants(family: int, width: int) -> list:
+    variants = [{"type": "integer"}, {"type": "string", "format": "date-time"}, {"type": "null"}, ref(f"Tag{family % BASE_SCHEMAS}")]
+    while len(variants) < width:
+        variants.append({"type": "array", "items": ref(f"Base{(family + len(variants)) % BASE_SCHEMAS}")})
+    return variants[:width]
+
+def family_schemas(family: int, ref_depth: int, union_width: int) -> Dict[str, Any]:
+    schemas: Dict[str, Any] = {}
+    for depth in range(ref_depth - 1):
+        schemas[f"Item{family}_{depth}"] = ref(f"Item{family}_{depth + 1}")
+    schemas[f"Item{family}_{ref_depth - 1}"] = {
+        "allOf": [
+            ref(f"Base{family % BASE_SCHEMAS}"),
+            {
+                "type": "object",
+                "required": ["name", "value"],
+                "properties": {
+                    "name": {"type": "string", "title": "Name"},
+                    "value": {"anyOf": union_variants(family, union_width), "title": "Value"},
+                    "variant": {"oneOf": [ref(f"Tag{family % BASE_SCHEMAS}"), ref(f"Base{(family + 1) % BASE_SCHEMAS}")]},
+                    "tags": {"type": "array", "items": ref(f"Tag{family % BASE_SCHEMAS}")},
+                    "status": {"type": "string", "enum": ["draft", "active", "archived"]},
+                    "detail": ref(f"Detail{family}_0"),
+                },
+            },
+        ]
+    }
+    for depth in range(ref_depth):
+        properties = {"note": {"type": ["string", "null"]}}
+        if depth + 1 < ref_depth:
+            properties["child"] = ref(f"Detail{family}_{depth + 1}")
+        schemas[f"Detail{family}_{depth}"] = {"type": "object", "properties": properties}
+    schemas[f"Create{family}"] = {
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "name": {"type": "string", "title": "Name"},
+            "value": {"anyOf": union_variants(family, union_width)},
+            "detail": ref(f"Detail{family}_0"),
+        },
+    }
+    return schemas
+
+def path_item(index: int, family: int) -> Dict[str, Any]:
+    security = [{"HTTPBearer": []}]
+    errors = {"422": {"description": "Validation Error", **json_content("HTTPValidationError")}}
+    return {
+        "parameters": [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+        "get": {
+            "summary": f"Read resource {index}",
+            "operationId": f"read_resource_{index}",
+            "security": security,
+            "parameters": [{"name": "expand", "in": "query", "schema": {"anyOf": [{"type": "string"}, {"type": "null"}]}}],
+            "responses": {"200": {"description": "Successful Response", **json_content(f"Item{family}_0")}, **errors},
+        },
+        "post": {
+            "summary": f"Create resource {index}",
+            "operationId": f"create_resource_{index}",
+            "security": security,
+            "requestBody": {"required": True, **json_content(f"Create{family}")},
+            "responses": {"200": {"description": "Successful Response", **json_content(f"Item{family}_0")}, **errors},
+        },
+        "delete": {
+            "summary": f"Delete resource {index}",
+            "operationId": f"delete_resource_{index}",
+            "security": security,
+            "responses": {"204": {"description": "Deleted"}, **errors},
+        },
+    }
+
+def generate_spec(path_count: int, ref_depth: int = DEFAULT_REF_DEPTH, union_width: int = DEFAULT_UNION_WIDTH, seed: int = 0) -> Dict[str, Any]:
+    """
+    OpenAPI 3.1 document with `path_count` paths (the last one is the token endpoint). Deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    schemas: Dict[str, Any] = {
+        "HTTPValidationError": {"type": "object", "properties": {"detail": {"type": "array", "items": ref("ValidationError")}}},
+        "ValidationError": {"type": "object", "required": ["loc", "msg"], "properties": {"loc": {"type": "array", "items": {"anyOf": [{"type": "string"}, {"type": "integer"}]}}, "msg": {"type": "string"}}},
+        "Token": {"type": "object", "required": ["access_token"], "properties": {"access_token": {"type": "string"}, "token_type": {"type": "string"}}},
+        "Credentials": {"type": "object", "properties": {"username": {"type": "string"}, "password": {"type": "string", "format": "password"}}},
+    }
+    for base in range(BASE_SCHEMAS):
+        schemas[f"Base{base}"] = {"type": "object", "properties": {"id": {"type": "integer"}, "created_at": {"type": "string", "format": "date-time"}}}
+        schemas[f"Tag{base}"] = {"type": "object", "properties": {"label": {"type": "string"}, "parent": ref(f"Tag{(base + 1) % BASE_SCHEMAS}")}}
+
+    resource_paths = max(0, path_count - 1)
+    families = max(1, resource_paths // PATHS_PER_FAMILY)
+    for family in range(families):
+        schemas.update(family_schemas(family, ref_depth, union_width))
+
+    roots = [f"r{root}" for root in range(max(1, resource_paths // 25))]
+    paths: Dict[str, Any] = {}
+    for index in range(resource_paths):
+        paths[f"/{rng.choice(roots)}/resource{index}/{{item_id}}"] = path_item(index, index % families)
+    paths[AUTH_PATH] = {
+        "post": {
+            "summary": "Issue a session",
+            "operationId": "issue_session",
+            "requestBody": {"required": True, **json_content("Credentials")},
+            "responses": {"200": {"description": "Successful Response", **json_content("Token")}},
+        }
+    }
+    return {
+        "openapi": "3.1.0",
+        "info": {"title": f"Synthetic API ({path_count} paths)", "version": "1.0.0"},
+        "paths": paths,
+        "components": {
+            "schemas": schemas,
+            "securitySchemes": {"HTTPBearer": {"type": "http", "scheme": "bearer"}},
+        },
+    }
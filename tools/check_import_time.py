@@ -0,0 +1,71 @@
+"""
+Import-time regression check for the CLI entry point.
+
+Runs `python -X importtime -c "import main"` from app/ a few times and fails when the best cumulative import time
+of `main` exceeds the budget, or when a heavy dependency is imported before a subcommand asks for it.
+
+    python tools/check_import_time.py [--budget-ms 150] [--runs 5]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+DEFAULT_BUDGET_MS = 150
+# Only the subcommands that need these may import them.
+HEAVY_MODULES = ["InquirerPy", "prompt_toolkit", "httpx", "tqdm", "keyring", "rich", "pytest", "api.commands"]
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)$")
+
+def measure(module: str) -> tuple[float, set]:
+    """
+    Cumulative import time of `module` in milliseconds, and every module imported along the way.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us, imported = None, set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        imported.add(match.group(3))
+        if match.group(3) == module:
+            cumulative_us = int(match.group(2))
+    if cumulative_us is None:
+        raise RuntimeError(f"No importtime line for {module}:\n{result.stderr[-2000:]}")
+    return cumulative_us / 1000, imported
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail when the CLI entry point imports too slowly")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help=f"Allowed import time in ms (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=5, help="Best of this many runs is compared to the budget (default: 5)")
+    args = parser.parse_args()
+
+    timings, imported = [], set()
+    for _ in range(max(1, args.runs)):
+        elapsed_ms, imported = measure(args.module)
+        timings.append(elapsed_ms)
+    best = min(timings)
+
+    heavy = sorted({heavy for heavy in HEAVY_MODULES for name in imported if name == heavy or name.startswith(f"{heavy}.")})
+    print(f"import {args.module}: best {best:.1f} ms of {len(timings)} runs (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if best > args.budget_ms:
+        print(f"FAIL: import time is over budget by {best - args.budget_ms:.1f} ms")
+        failed = True
+    if heavy:
+        print(f"FAIL: imported at startup: {', '.join(heavy)}")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())